@@ -0,0 +1,138 @@
+import json
+import os
+import pygame
+
+# Cache of the images the window draws.
+
+# Every Game used to load its 12 piece images from the theme's
+# PNGs and scale them to the square size, and every Button
+# scaled its three images. Here each image is made once per
+# process, keyed by what it depends on:
+#   pieces  - (theme, piece, square size)
+#   scaled  - (image, size), ex: the button images
+#   images  - the name of an image in the Images folder
+# so starting another game (or going back to a theme that was
+# used before) only looks them up.
+# The piece images of a theme and size can also be saved to
+# disk as one packed image (an atlas: the pieces side by side
+# in ATLAS_PIECES order), so the next time the program starts
+# it reads one file instead of decoding and scaling 12. An
+# atlas older than any of its theme's PNGs is made again.
+
+path = "".join(os.path.split(__file__)[:-1])
+with open(os.path.join(path, "config.json")) as file:
+    config = json.load(file)
+    file.close()
+
+THEMES_FOLDER = os.path.join(path, "Themes")
+IMAGES_FOLDER = os.path.join(path, "Images")
+# the atlases are made here (turned off with "asset_atlas": false)
+ATLAS_FOLDER = os.path.join(path, "Atlases") if config.get("asset_atlas", True) else None
+ATLAS_PIECES = ['wP', 'bP', 'wK', 'bK', 'wQ', 'bQ', 'wB', 'bB', 'wN', 'bN', 'wR', 'bR']
+
+class AssetCache:
+
+    def __init__(self, atlas_folder:str=ATLAS_FOLDER):
+        # atlas_folder is None to keep the images in memory only
+        self.atlas_folder = atlas_folder
+        self.pieces = {}
+        self.scaled_images = {}
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.pieces.clear()
+        self.scaled_images.clear()
+        self.images.clear()
+        self.hits = self.misses = 0
+
+    def piece_images(self, theme:str, size:int, pieces:list=ATLAS_PIECES) -> dict:
+        # {piece: image} of the theme's pieces scaled to size
+        # by size pixels, from memory, the atlas or the PNGs
+        if all((theme, piece, size) in self.pieces for piece in pieces):
+            self.hits += len(pieces)
+            return {piece: self.pieces[(theme, piece, size)] for piece in pieces}
+        self.misses += len(pieces)
+        images = self.load_atlas(theme, size)
+        if images is None:
+            images = {piece: self.load_piece(theme, piece, size) for piece in ATLAS_PIECES}
+            self.save_atlas(theme, size, images)
+        for piece, image in images.items():
+            self.pieces[(theme, piece, size)] = image
+        return {piece: images[piece] for piece in pieces}
+
+    def load_piece(self, theme:str, piece:str, size:int) -> pygame.Surface:
+        image = pygame.image.load(os.path.join(THEMES_FOLDER, theme, f"{piece}.png"))
+        return self.prepare(pygame.transform.scale(image, (size, size)))
+
+    def image(self, name:str) -> pygame.Surface:
+        # one of the images in the Images folder (ex: "normal")
+        image = self.images.get(name)
+        if image is None:
+            self.misses += 1
+            image = self.images[name] = pygame.image.load(os.path.join(IMAGES_FOLDER, f"{name}.png"))
+        else:
+            self.hits += 1
+        return image
+
+    def scaled(self, image:pygame.Surface, size:tuple) -> pygame.Surface:
+        # the image scaled to size. The result is shared, so it
+        # has to be copied before drawing on it
+        size = (int(size[0]), int(size[1]))
+        key = (image, size)
+        scaled = self.scaled_images.get(key)
+        if scaled is None:
+            self.misses += 1
+            scaled = self.scaled_images[key] = pygame.transform.scale(image, size)
+        else:
+            self.hits += 1
+        return scaled
+
+    def prepare(self, image:pygame.Surface) -> pygame.Surface:
+        # once there is a window, images are converted to its
+        # pixel format, which makes drawing them faster
+        if pygame.display.get_surface() is not None:
+            return image.convert_alpha()
+        return image
+
+    def atlas_path(self, theme:str, size:int) -> str:
+        # saved as an uncompressed bitmap (with the see-through
+        # parts kept), reading it is a copy rather than decoding
+        # a PNG
+        return os.path.join(self.atlas_folder, f"{theme}_{size}.bmp")
+
+    def load_atlas(self, theme:str, size:int) -> dict:
+        # the pieces cut out of the saved atlas, or None if
+        # there isn't one or a theme PNG has changed since
+        if self.atlas_folder is None:
+            return None
+        atlas_path = self.atlas_path(theme, size)
+        if not os.path.exists(atlas_path):
+            return None
+        made = os.path.getmtime(atlas_path)
+        for piece in ATLAS_PIECES:
+            if os.path.getmtime(os.path.join(THEMES_FOLDER, theme, f"{piece}.png")) > made:
+                return None
+        atlas = self.prepare(pygame.image.load(atlas_path))
+        if atlas.get_size() != (size * len(ATLAS_PIECES), size):
+            return None
+        return {piece: atlas.subsurface((i * size, 0, size, size)) for i, piece in enumerate(ATLAS_PIECES)}
+
+    def save_atlas(self, theme:str, size:int, images:dict):
+        if self.atlas_folder is None:
+            return
+        atlas = pygame.Surface((size * len(ATLAS_PIECES), size), pygame.SRCALPHA)
+        for i, piece in enumerate(ATLAS_PIECES):
+            # adding to the empty atlas copies the pixels as they
+            # are, a normal blit would blend the see-through edges
+            atlas.blit(images[piece], (i * size, 0), special_flags=pygame.BLEND_RGBA_ADD)
+        os.makedirs(self.atlas_folder, exist_ok=True)
+        pygame.image.save(atlas, self.atlas_path(theme, size))
+
+    def __str__(self) -> str:
+        return (f"{len(self.pieces)} piece images, {len(self.scaled_images)} scaled images, "
+            f"{self.hits} hits, {self.misses} misses")
+
+# shared by every game and button in the process
+cache = AssetCache()
@@ -0,0 +1,93 @@
+from bitboard import DIM, PIECES, EMPTY
+from evaluation import MATERIAL_VALUES, PIECE_SQUARE_VALUES
+
+# Scores many positions at once with numpy.
+
+# evaluation.evaluate is quick for the one position the
+# search is on, but analysing thousands of saved positions
+# one at a time is slow in python. Here positions are packed
+# into one array and scored in a single numpy call. Two
+# layouts are accepted:
+#   (N, 64)     - one int8 piece code per square, 0 is empty
+#                 and PIECES[code - 1] is the piece
+#   (N, 12, 64) - one 0/1 plane per piece, in PIECES order
+# Scores are material plus piece-square in centipawns, the
+# same as evaluation.evaluate. numpy is optional, the engine
+# works without it and only this module needs it.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SQUARES = DIM * DIM
+PIECE_CODES = {piece: i + 1 for i, piece in enumerate(PIECES)}
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs numpy, install it with 'pip install numpy'")
+
+def _score_table():
+    # SCORE_TABLE[code][sq] is the score of that piece on
+    # that square from white's side (black pieces count
+    # against white), row 0 is the empty square
+    table = np.zeros((len(PIECES) + 1, SQUARES), dtype=np.int32)
+    for piece, code in PIECE_CODES.items():
+        sign = 1 if piece[0] == "w" else -1
+        for sq in range(SQUARES):
+            table[code, sq] = sign * (MATERIAL_VALUES[piece] + PIECE_SQUARE_VALUES[piece][sq])
+    return table
+
+SCORE_TABLE = _score_table() if np is not None else None
+
+def encode_boards(boards:list):
+    # packs 8x8 boards (GameState.board) into an (N, 64)
+    # int8 array of piece codes
+    _require_numpy()
+    codes = np.zeros((len(boards), SQUARES), dtype=np.int8)
+    for i, board in enumerate(boards):
+        row = codes[i]
+        for r in range(DIM):
+            for c in range(DIM):
+                piece = board[r][c]
+                if piece != EMPTY:
+                    row[r * DIM + c] = PIECE_CODES[piece]
+    return codes
+
+def encode_planes(boards:list):
+    # packs 8x8 boards into an (N, 12, 64) int8 array with
+    # a 1 wherever the piece of that plane stands
+    codes = encode_boards(boards)
+    planes = np.arange(1, len(PIECES) + 1, dtype=np.int8)[None, :, None]
+    return (codes[:, None, :] == planes).astype(np.int8)
+
+def evaluate_batch(positions, white_to_move=None):
+    # Scores every position in an (N, 64) or (N, 12, 64)
+    # array. The scores are from white's side, unless
+    # white_to_move (a bool or N bools) is given, then they
+    # are from the side to move's like evaluation.evaluate.
+    # Returns an (N,) int32 array
+    _require_numpy()
+    positions = np.asarray(positions)
+    if positions.ndim == 2 and positions.shape[1] == SQUARES:
+        # pick SCORE_TABLE[code, sq] for every square and add them
+        scores = SCORE_TABLE[positions.astype(np.intp), np.arange(SQUARES)].sum(axis=1)
+    elif positions.ndim == 3 and positions.shape[1:] == (len(PIECES), SQUARES):
+        scores = np.tensordot(positions.astype(np.int32), SCORE_TABLE[1:], axes=([1, 2], [0, 1]))
+    else:
+        raise ValueError(f"expected an (N, 64) or (N, {len(PIECES)}, 64) array, got {positions.shape}")
+    scores = scores.astype(np.int32)
+    if white_to_move is not None:
+        scores = np.where(white_to_move, scores, -scores).astype(np.int32)
+    return scores
+
+def evaluate_children(state, moves:list):
+    # scores the position after each move together, from the
+    # side to move's view before the moves (so the higher the
+    # better for the side playing the move)
+    boards = []
+    for move in moves:
+        state.make_move(move)
+        boards.append(state.board)
+        state.unmake_move()
+    return evaluate_batch(encode_boards(boards), state.white_to_move)
@@ -0,0 +1,352 @@
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from bitboard import DIM, row_col, lsb
+from engine import GameState
+from move_cache import MoveCache
+from computer import Computer, ParallelComputer, CHECKMATE
+
+# Small timing benchmarks for the engine. Run with
+#   python benchmark.py attacks
+# to see how long each way of answering "is this square
+# attacked" takes.
+
+def random_positions(count:int, plies:int=20, seed:int=0) -> list:
+    # plays random legal moves from the start position
+    # to get middlegame-ish positions to time things on
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for i in range(plies):
+            moves = state.all_legal_moves()
+            if len(moves) == 0:
+                break
+            state.make_move(rng.choice(moves))
+        else:
+            positions.append(state)
+    return positions
+
+def time_it(func, repeat:int) -> float:
+    # returns the time per call in microseconds
+    start = time.perf_counter()
+    for i in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def bench_attacks(args):
+    # times every square of every position being tested
+    # three ways: scanning the end squares of the other
+    # team's moves (how it was done on the list board),
+    # building the other team's full attack bitboard, and
+    # the attack query that looks outward from the square
+    positions = random_positions(args.positions)
+
+    def move_scan():
+        for state in positions:
+            for sq in range(DIM * DIM):
+                row, col = row_col(sq)
+                for move in state.all_possible_moves(True):
+                    if move.end_row == row and move.end_col == col:
+                        break
+
+    def attack_map():
+        for state in positions:
+            team = state.get_team(True)
+            for sq in range(DIM * DIM):
+                bool(state.get_attacks(team) & (1 << sq))
+
+    def attack_query():
+        for state in positions:
+            team = state.get_team(True)
+            for sq in range(DIM * DIM):
+                state.is_attacked_by(sq, team)
+
+    # all three ways have to agree
+    for state in positions:
+        team = state.get_team(True)
+        attacks = state.get_attacks(team)
+        for sq in range(DIM * DIM):
+            assert bool(attacks & (1 << sq)) == state.is_attacked_by(sq, team)
+
+    queries = len(positions) * DIM * DIM
+    print(f"{queries} queries over {len(positions)} positions")
+    for name, func in [("move scan", move_scan), ("attack map", attack_map), ("attack query", attack_query)]:
+        per_call = time_it(func, args.repeat) / queries
+        print(f"{name:>14}: {per_call:8.2f} us per query")
+
+def bench_legal(args):
+    # times all_legal_moves against the way legal moves
+    # used to be found: making every pseudo-legal move
+    # and checking if the king is attacked afterwards
+    positions = random_positions(args.positions, args.plies)
+    for state in positions:
+        # time the generator itself, not the move cache
+        state.move_cache = None
+
+    def make_and_test():
+        for state in positions:
+            team = state.get_team()
+            opposing_team = state.get_team(False, True)
+            for move in state.all_possible_moves():
+                state.make_move(move)
+                state.is_attacked_by(lsb(state.bitboards[team + "K"]), opposing_team)
+                state.unmake_move()
+
+    def legal_generator():
+        for state in positions:
+            state.all_legal_moves()
+
+    moves = sum(len(state.all_legal_moves()) for state in positions)
+    print(f"{len(positions)} positions after {args.plies} random plies, {moves} legal moves")
+    for name, func in [("make and test", make_and_test), ("legal generator", legal_generator)]:
+        per_call = time_it(func, args.repeat)
+        print(f"{name:>16}: {per_call / len(positions):8.1f} us per position, "
+            f"{moves / per_call * 1e6:9.0f} moves/s")
+
+def bench_moves(args):
+    # measures how much memory each Move takes and how fast
+    # the legal move generator can make them
+    positions = random_positions(args.positions, args.plies)
+    for state in positions:
+        state.move_cache = None
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [state.all_legal_moves() for state in positions]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = sum(len(moves) for moves in kept)
+    # the lists holding the moves take 8 bytes a move
+    print(f"{count} moves, {(after - before) / count - 8:.0f} bytes per move")
+
+    def generate():
+        for state in positions:
+            state.all_legal_moves()
+    per_call = time_it(generate, args.repeat)
+    print(f"{count / per_call * 1e6:.0f} moves made per second")
+
+def minimax(state:GameState, depth:int) -> int:
+    # plain minimax with no pruning, how the computer used
+    # to search, scored from the side to move's view
+    if depth == 0:
+        return state.get_material() if state.white_to_move else -state.get_material()
+    moves = state.all_legal_moves()
+    if len(moves) == 0:
+        return -CHECKMATE if state.is_check() else 0
+    best = -CHECKMATE
+    for move in moves:
+        state.make_move(move)
+        best = max(best, -minimax(state, depth - 1))
+        state.unmake_move()
+    return best
+
+def bench_search(args):
+    # times the old full width search to args.depth plies on
+    # each position, then gives the alpha-beta search the same
+    # amount of time and shows how deep it gets
+    positions = random_positions(args.positions, args.plies)
+    total_old = total_new = 0
+    depths = []
+    for i, state in enumerate(positions):
+        start = time.perf_counter()
+        minimax(state, args.depth)
+        elapsed = time.perf_counter() - start
+
+        cpu = Computer(state, depth=64, node_limit=float("inf"), time_limit=elapsed)
+        start = time.perf_counter()
+        cpu.get_move()
+        total_old += elapsed
+        total_new += time.perf_counter() - start
+        depths.append(cpu.completed_depth)
+        print(f"position {i:>2}: {elapsed:6.2f}s  minimax depth {args.depth}, "
+            f"alpha-beta depth {cpu.completed_depth} ({cpu.nodes} nodes, {cpu.qnodes} qnodes)")
+    print(f"minimax {total_old:.2f}s, alpha-beta {total_new:.2f}s, "
+        f"average alpha-beta depth {sum(depths) / len(depths):.2f}")
+
+def bench_ordering(args):
+    # searches each position to a fixed depth with only the
+    # table's move tried first and then with full move
+    # ordering, and compares the number of nodes searched
+    positions = random_positions(args.positions, args.plies)
+    totals = {False: 0, True: 0}
+    times = {False: 0.0, True: 0.0}
+    for i, state in enumerate(positions):
+        nodes = {}
+        for ordering in (False, True):
+            cpu = Computer(state, depth=args.depth, node_limit=float("inf"), time_limit=None, move_ordering=ordering)
+            random.seed(i)
+            start = time.perf_counter()
+            cpu.get_move()
+            times[ordering] += time.perf_counter() - start
+            nodes[ordering] = cpu.nodes
+            totals[ordering] += cpu.nodes
+        print(f"position {i:>2}: {nodes[False]:>8} nodes unordered, {nodes[True]:>8} ordered")
+    print(f"depth {args.depth}: {totals[False]} nodes in {times[False]:.2f}s unordered, "
+        f"{totals[True]} nodes in {times[True]:.2f}s ordered "
+        f"({1 - totals[True] / totals[False]:.1%} fewer nodes)")
+
+def bench_quiescence(args):
+    # searches each position to a fixed depth with and without
+    # the quiescence search, showing how many extra positions
+    # the quiescence search costs next to the main search
+    positions = random_positions(args.positions, args.plies)
+    for quiescence_depth in (0, args.quiescence_depth):
+        nodes = qnodes = 0
+        start = time.perf_counter()
+        for i, state in enumerate(positions):
+            cpu = Computer(state, depth=args.depth, node_limit=float("inf"), time_limit=None,
+                quiescence_depth=quiescence_depth)
+            random.seed(i)
+            cpu.get_move()
+            nodes += cpu.nodes
+            qnodes += cpu.qnodes
+        elapsed = time.perf_counter() - start
+        print(f"quiescence depth {quiescence_depth}: {nodes:>8} nodes, {qnodes:>8} qnodes "
+            f"({qnodes / nodes:.2f} per node), {elapsed:.2f}s")
+
+def bench_cache(args):
+    # searches each position to a fixed depth with and without
+    # the legal move cache, and shows how often it was used
+    positions = random_positions(args.positions, args.plies)
+    for size in (0, args.size):
+        hits = lookups = nodes = 0
+        start = time.perf_counter()
+        for i, state in enumerate(positions):
+            state = state.copy()
+            state.move_cache = MoveCache(size) if size > 0 else None
+            cpu = Computer(state, depth=args.depth, node_limit=float("inf"), time_limit=None)
+            random.seed(i)
+            cpu.get_move()
+            nodes += cpu.nodes
+            if size > 0:
+                hits += state.move_cache.hits
+                lookups += state.move_cache.hits + state.move_cache.misses
+        elapsed = time.perf_counter() - start
+        name = "no cache" if size == 0 else f"{size} positions"
+        hit_rate = f", {hits / lookups:.1%} hits" if lookups > 0 else ""
+        print(f"{name:>15}: {elapsed:6.2f}s  {nodes:>8} nodes{hit_rate}")
+
+def bench_batch(args):
+    # scores the same positions one at a time with
+    # evaluation.evaluate and all at once with numpy
+    import evaluation
+    import batch_evaluation
+    positions = random_positions(args.positions, args.plies)
+    boards = [state.board for state in positions]
+    sides = [state.white_to_move for state in positions]
+
+    single = [evaluation.evaluate(state) for state in positions]
+    for layout, encode in (("(N, 64)", batch_evaluation.encode_boards), ("(N, 12, 64)", batch_evaluation.encode_planes)):
+        assert list(batch_evaluation.evaluate_batch(encode(boards), sides)) == single
+
+    def one_at_a_time():
+        for state in positions:
+            evaluation.score_position(state.bitboards)
+
+    codes = batch_evaluation.encode_boards(boards)
+    planes = batch_evaluation.encode_planes(boards)
+    print(f"{len(positions)} positions")
+    for name, func in [("from scratch", one_at_a_time),
+            ("encode (N, 64)", lambda: batch_evaluation.encode_boards(boards)),
+            ("batch (N, 64)", lambda: batch_evaluation.evaluate_batch(codes, sides)),
+            ("batch (N, 12, 64)", lambda: batch_evaluation.evaluate_batch(planes, sides))]:
+        per_call = time_it(func, args.repeat)
+        print(f"{name:>18}: {per_call / len(positions):8.2f} us per position")
+
+def bench_parallel(args):
+    # time to reach a fixed depth on the same positions with
+    # one Computer and with 1, 2, 4 and 8 worker processes
+    positions = random_positions(args.positions, args.plies)
+    print(f"{len(positions)} positions to depth {args.depth}, {os.cpu_count()} cores")
+    serial = None
+    for workers in [0] + args.workers:
+        if workers == 0:
+            cpu = Computer(positions[0], depth=args.depth, node_limit=float("inf"), time_limit=None)
+        else:
+            cpu = ParallelComputer(positions[0], workers, depth=args.depth, node_limit=float("inf"), time_limit=None)
+            # start the processes before timing
+            cpu.start_pool()
+            list(cpu.pool.map(abs, range(workers * 4)))
+        nodes = 0
+        start = time.perf_counter()
+        for i, state in enumerate(positions):
+            cpu.state = state
+            random.seed(i)
+            cpu.get_move()
+            nodes += cpu.nodes + cpu.qnodes
+        elapsed = time.perf_counter() - start
+        cpu.close()
+        if serial is None:
+            serial = elapsed
+        name = "serial" if workers == 0 else f"{workers} workers"
+        print(f"{name:>10}: {elapsed:7.2f}s  {nodes:>8} nodes  {nodes / elapsed:7.0f} nodes/s  "
+            f"speedup {serial / elapsed:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    attacks = commands.add_parser("attacks", help="is_attacked_by vs the older attack checks")
+    attacks.add_argument("--positions", type=int, default=20)
+    attacks.add_argument("--repeat", type=int, default=3)
+    attacks.set_defaults(func=bench_attacks)
+
+    legal = commands.add_parser("legal", help="all_legal_moves vs making and testing every move")
+    legal.add_argument("--positions", type=int, default=50)
+    legal.add_argument("--plies", type=int, default=30)
+    legal.add_argument("--repeat", type=int, default=3)
+    legal.set_defaults(func=bench_legal)
+
+    moves = commands.add_parser("moves", help="memory per Move and how fast they are made")
+    moves.add_argument("--positions", type=int, default=50)
+    moves.add_argument("--plies", type=int, default=30)
+    moves.add_argument("--repeat", type=int, default=3)
+    moves.set_defaults(func=bench_moves)
+
+    search = commands.add_parser("search", help="depth reached by alpha-beta in the time minimax takes")
+    search.add_argument("--positions", type=int, default=10)
+    search.add_argument("--plies", type=int, default=20)
+    search.add_argument("--depth", type=int, default=3)
+    search.set_defaults(func=bench_search)
+
+    ordering = commands.add_parser("ordering", help="nodes to a fixed depth with and without move ordering")
+    ordering.add_argument("--positions", type=int, default=10)
+    ordering.add_argument("--plies", type=int, default=20)
+    ordering.add_argument("--depth", type=int, default=4)
+    ordering.set_defaults(func=bench_ordering)
+
+    quiescence = commands.add_parser("quiescence", help="nodes and time with and without the quiescence search")
+    quiescence.add_argument("--positions", type=int, default=10)
+    quiescence.add_argument("--plies", type=int, default=20)
+    quiescence.add_argument("--depth", type=int, default=3)
+    quiescence.add_argument("--quiescence-depth", type=int, default=8)
+    quiescence.set_defaults(func=bench_quiescence)
+
+    cache = commands.add_parser("cache", help="search time with and without the legal move cache")
+    cache.add_argument("--positions", type=int, default=10)
+    cache.add_argument("--plies", type=int, default=20)
+    cache.add_argument("--depth", type=int, default=4)
+    cache.add_argument("--size", type=int, default=2048)
+    cache.set_defaults(func=bench_cache)
+
+    batch = commands.add_parser("batch", help="scoring positions one at a time vs in a numpy batch")
+    batch.add_argument("--positions", type=int, default=2000)
+    batch.add_argument("--plies", type=int, default=30)
+    batch.add_argument("--repeat", type=int, default=5)
+    batch.set_defaults(func=bench_batch)
+
+    parallel = commands.add_parser("parallel", help="time to depth with more worker processes")
+    parallel.add_argument("--positions", type=int, default=5)
+    parallel.add_argument("--plies", type=int, default=20)
+    parallel.add_argument("--depth", type=int, default=4)
+    parallel.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parallel.set_defaults(func=bench_parallel)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
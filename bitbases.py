@@ -0,0 +1,237 @@
+import argparse
+import mmap
+import os
+import time
+from collections import deque
+from bitboard import PAWN_ATTACKS, KING_ATTACKS, rook_attacks, queen_attacks, iter_bits, lsb, popcount
+
+# Win/draw bitbases for the basic endgames: king and pawn,
+# king and rook, and king and queen against a lone king.
+
+# Every position of an endgame gets one bit, set if the side
+# with the extra piece (the "strong" side) wins with best play
+# and clear if it's a draw (the lone king can never win). The
+# bits are worked out backwards from the checkmates
+# (retrograde analysis):
+#   - a position where the lone king is checkmated is a win
+#   - a position where the strong side is to move is a win if
+#     one of its moves reaches a win
+#   - a position where the lone king is to move is a win if
+#     every one of its moves reaches a win
+# Instead of checking every position over and over, each new
+# win is taken back one move at a time (an "unmove") to find
+# the positions leading to it, and every lone king position
+# keeps a count of its moves that don't reach a win yet.
+# The moves follow the same rules as engine.GameState (the
+# attack tables in bitboard.py), which
+# tests/test_bitbases.py checks against GameState itself.
+
+# Positions are stored with the strong side as white, a
+# position with black as the strong side is flipped top to
+# bottom and the colours swapped. The index of a position is
+#   ((side to move * 64 + white king) * 64 + black king) * 64 + piece
+# where side to move is 0 for white and 1 for black, so a
+# table is 2 * 64 * 64 * 64 bits (64KB). The files are made
+# with python bitbases.py and read with mmap.
+
+ENDGAMES = ["KQK", "KRK", "KPK"]
+FOLDER = os.path.join("".join(os.path.split(__file__)[:-1]), "Bitbases")
+POSITIONS = 2 * 64 * 64 * 64
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+def index(black_to_move:int, white_king:int, black_king:int, piece:int) -> int:
+    return ((black_to_move * 64 + white_king) * 64 + black_king) * 64 + piece
+
+def piece_attacks(piece:str, sq:int, occupied:int) -> int:
+    # squares attacked by the strong side's piece
+    if piece == "Q":
+        return queen_attacks(sq, occupied)
+    if piece == "R":
+        return rook_attacks(sq, occupied)
+    return PAWN_ATTACKS["w"][sq]
+
+def legal(white_king:int, black_king:int, piece:int, endgame:str) -> bool:
+    # the three pieces are on different squares, the kings
+    # aren't next to each other and pawns aren't on the first
+    # or last row
+    if white_king == black_king or piece == white_king or piece == black_king:
+        return False
+    if KING_ATTACKS[white_king] >> black_king & 1:
+        return False
+    return endgame[1] != "P" or 0 < piece >> 3 < 7
+
+def black_in_check(white_king:int, black_king:int, piece:int, endgame:str) -> bool:
+    occupied = 1 << white_king | 1 << black_king | 1 << piece
+    return bool(piece_attacks(endgame[1], piece, occupied) >> black_king & 1)
+
+def black_moves(white_king:int, black_king:int, piece:int, endgame:str) -> tuple:
+    # the lone king's legal moves. Returns (squares it can
+    # go to without capturing, whether it can take the piece)
+    occupied = 1 << white_king | 1 << piece
+    # the king doesn't block the piece's attacks on the
+    # squares behind it
+    attacked = KING_ATTACKS[white_king] | piece_attacks(endgame[1], piece, occupied)
+    targets = KING_ATTACKS[black_king] & ~attacked & ~(1 << white_king)
+    captures = bool(targets >> piece & 1)
+    return targets & ~(1 << piece), captures
+
+def generate(endgame:str, tables:dict) -> bytearray:
+    # works out the win bits of one endgame. tables has the
+    # bits of the endgames a pawn can promote into
+    piece_type = endgame[1]
+    win = bytearray(POSITIONS)
+    # for every lone king position, how many of its moves
+    # don't lead to a win (yet)
+    remaining = [0] * (POSITIONS // 2)
+    queue = deque()
+
+    for white_king in range(64):
+        for black_king in range(64):
+            for piece in range(64):
+                if not legal(white_king, black_king, piece, endgame):
+                    continue
+                targets, captures = black_moves(white_king, black_king, piece, endgame)
+                moves = popcount(targets) + captures
+                remaining[index(0, white_king, black_king, piece)] = moves
+                if moves == 0 and black_in_check(white_king, black_king, piece, endgame):
+                    # checkmate
+                    win[index(1, white_king, black_king, piece)] = 1
+                    queue.append((1, white_king, black_king, piece))
+                if piece_type == "P" and piece >> 3 == 1 and not black_in_check(white_king, black_king, piece, endgame):
+                    # promoting to a queen or rook that wins
+                    promotion = piece - 8
+                    if promotion != white_king and promotion != black_king:
+                        for promoted in ("KQK", "KRK"):
+                            if tables[promoted][index(1, white_king, black_king, promotion)]:
+                                win[index(0, white_king, black_king, piece)] = 1
+                                queue.append((0, white_king, black_king, piece))
+                                break
+
+    while queue:
+        black_to_move, white_king, black_king, piece = queue.popleft()
+        occupied = 1 << white_king | 1 << black_king | 1 << piece
+        if black_to_move:
+            # white to move positions one white move before
+            # this one are wins
+            for sq in iter_bits(KING_ATTACKS[white_king] & ~occupied & ~KING_ATTACKS[black_king]):
+                unmove(win, queue, (0, sq, black_king, piece), endgame)
+            if piece_type == "P":
+                sources = 0
+                if piece >> 3 < 6 and not occupied >> (piece + 8) & 1:
+                    sources |= 1 << (piece + 8)
+                    if piece >> 3 == 4 and not occupied >> (piece + 16) & 1:
+                        sources |= 1 << (piece + 16)
+            else:
+                sources = piece_attacks(piece_type, piece, occupied) & ~occupied
+            for sq in iter_bits(sources):
+                unmove(win, queue, (0, white_king, black_king, sq), endgame)
+        else:
+            # lone king positions one black move before this one
+            # have one less move that doesn't lose
+            for sq in iter_bits(KING_ATTACKS[black_king] & ~occupied & ~KING_ATTACKS[white_king]):
+                i = index(0, white_king, sq, piece)
+                if win[i + POSITIONS // 2] or not legal(white_king, sq, piece, endgame):
+                    continue
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    win[i + POSITIONS // 2] = 1
+                    queue.append((1, white_king, sq, piece))
+    return win
+
+def unmove(win:bytearray, queue:deque, position:tuple, endgame:str):
+    # marks a white to move position as a win, if it is a
+    # legal position and isn't marked yet
+    black_to_move, white_king, black_king, piece = position
+    i = index(0, white_king, black_king, piece)
+    if win[i] or not legal(white_king, black_king, piece, endgame):
+        return
+    if black_in_check(white_king, black_king, piece, endgame):
+        return
+    win[i] = 1
+    queue.append(position)
+
+def pack(bits:bytearray) -> bytes:
+    # 8 positions to a byte, lowest bit first
+    packed = bytearray(len(bits) // 8)
+    for i in range(0, len(bits), 8):
+        byte = 0
+        for j in range(8):
+            byte |= bits[i + j] << j
+        packed[i >> 3] = byte
+    return bytes(packed)
+
+def build(folder:str=FOLDER):
+    # makes every bitbase file, the queen and rook ones
+    # first since the pawn one needs them for promotions
+    os.makedirs(folder, exist_ok=True)
+    tables = {}
+    for endgame in ENDGAMES:
+        start = time.perf_counter()
+        tables[endgame] = generate(endgame, tables)
+        with open(os.path.join(folder, endgame + ".bin"), "wb") as file:
+            file.write(pack(tables[endgame]))
+        wins = sum(tables[endgame])
+        print(f"{endgame}: {wins} wins, {time.perf_counter() - start:.1f}s")
+
+class Bitbases:
+
+    def __init__(self, folder:str=FOLDER):
+        # maps whichever bitbase files have been made
+        self.files = {}
+        self.tables = {}
+        for endgame in ENDGAMES:
+            file_path = os.path.join(folder, endgame + ".bin")
+            if os.path.exists(file_path):
+                file = open(file_path, "rb")
+                self.files[endgame] = file
+                self.tables[endgame] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.probes = 0
+
+    def close(self):
+        for endgame in self.tables:
+            self.tables[endgame].close()
+            self.files[endgame].close()
+        self.tables, self.files = {}, {}
+
+    def probe(self, state) -> int:
+        # WIN, DRAW or LOSS for the side to move, or None if
+        # the position isn't one of the endgames
+        occupancy = state.occupancy
+        if popcount(occupancy["w"] | occupancy["b"]) != 3:
+            return None
+        strong = "w" if occupancy["w"] & (occupancy["w"] - 1) else "b"
+        bitboards = state.bitboards
+        for piece_type in "QRP":
+            if bitboards[strong + piece_type]:
+                break
+        else:
+            return None
+        table = self.tables.get("K" + piece_type + "K")
+        if table is None:
+            return None
+        self.probes += 1
+        weak = "b" if strong == "w" else "w"
+        white_king = lsb(bitboards[strong + "K"])
+        black_king = lsb(bitboards[weak + "K"])
+        piece = lsb(bitboards[strong + piece_type])
+        black_to_move = state.white_to_move != (strong == "w")
+        if strong == "b":
+            # flip the board so the strong side is white
+            white_king, black_king, piece = white_king ^ 56, black_king ^ 56, piece ^ 56
+        i = index(black_to_move, white_king, black_king, piece)
+        if not table[i >> 3] >> (i & 7) & 1:
+            return DRAW
+        return LOSS if black_to_move else WIN
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+def main():
+    parser = argparse.ArgumentParser(description="Make the endgame bitbases")
+    parser.parse_args()
+    build()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# Bitboard helpers for the engine.
+
+# A bitboard is a python int where bit n is set if
+# square n is occupied. Squares are numbered the same
+# way as the board list is indexed, starting in the top
+# left corner (a8) with 0 and going right and down:
+#   square = row * 8 + col
+# so a8 is 0, h8 is 7, a1 is 56 and h1 is 63
+
+DIM = 8
+FULL = (1 << 64) - 1
+
+TEAMS = ["w", "b"]
+PIECE_TYPES = ["P", "N", "B", "R", "Q", "K"]
+PIECES = [team + piece for team in TEAMS for piece in PIECE_TYPES]
+EMPTY = "  "
+
+# (row, col) directions for the pieces that move
+# one step at a time
+KNIGHT_DIRECTIONS = [
+    (2, 1), (1, 2),
+    (2, -1), (1, -2),
+    (-2, 1), (-1, 2),
+    (-2, -1), (-1, -2)
+]
+KING_DIRECTIONS = [
+    (1, 1), (1, -1), (-1, 1), (-1, -1),
+    (1, 0), (0, 1), (-1, 0), (0, -1)
+]
+
+# Ray directions for the sliding pieces. The first four
+# are the rook directions, the last four are the bishop
+# directions. A direction is "positive" if the square
+# number goes up while walking along it, which tells us
+# whether the closest blocker is the lowest or highest bit
+RAY_DIRECTIONS = [
+    (1, 0), (0, 1), (-1, 0), (0, -1),
+    (1, 1), (1, -1), (-1, 1), (-1, -1)
+]
+# the direction that goes the opposite way of each direction
+OPPOSITE_DIRECTION = [2, 3, 0, 1, 7, 6, 5, 4]
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+POSITIVE = [r * DIM + c > 0 for r, c in RAY_DIRECTIONS]
+
+def square(row:int, col:int) -> int:
+    # converts a (row, col) pair to a square number
+    return row * DIM + col
+
+def row_col(sq:int) -> tuple:
+    # converts a square number to a (row, col) pair
+    return divmod(sq, DIM)
+
+def on_board(row:int, col:int) -> bool:
+    return 0 <= row < DIM and 0 <= col < DIM
+
+def lsb(bb:int) -> int:
+    # square number of the lowest set bit
+    return (bb & -bb).bit_length() - 1
+
+def iter_bits(bb:int):
+    # yields the square number of every set bit,
+    # lowest first
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+def popcount(bb:int) -> int:
+    return bb.bit_count()
+
+def _step_table(directions:list) -> list:
+    # for each square, makes a bitboard of every square
+    # one step away in the given directions
+    table = []
+    for sq in range(DIM * DIM):
+        row, col = row_col(sq)
+        bb = 0
+        for r, c in directions:
+            if on_board(row + r, col + c):
+                bb |= 1 << square(row + r, col + c)
+        table.append(bb)
+    return table
+
+def _ray_table() -> list:
+    # RAYS[direction][square] is a bitboard of every
+    # square from (but not including) the square to the
+    # edge of the board in that direction
+    rays = []
+    for r, c in RAY_DIRECTIONS:
+        table = []
+        for sq in range(DIM * DIM):
+            row, col = row_col(sq)
+            bb = 0
+            row, col = row + r, col + c
+            while on_board(row, col):
+                bb |= 1 << square(row, col)
+                row, col = row + r, col + c
+            table.append(bb)
+        rays.append(table)
+    return rays
+
+KNIGHT_ATTACKS = _step_table(KNIGHT_DIRECTIONS)
+KING_ATTACKS = _step_table(KING_DIRECTIONS)
+# PAWN_ATTACKS[team][square] is the two squares diagonally
+# in front of a pawn of that team (white pawns go up)
+PAWN_ATTACKS = {
+    "w": _step_table([(-1, -1), (-1, 1)]),
+    "b": _step_table([(1, -1), (1, 1)])
+}
+RAYS = _ray_table()
+# every square a rook/bishop could reach from the square
+# on an empty board, used to skip the ray walk when no
+# slider is lined up with the square at all
+ROOK_LINES = [RAYS[0][sq] | RAYS[1][sq] | RAYS[2][sq] | RAYS[3][sq] for sq in range(DIM * DIM)]
+BISHOP_LINES = [RAYS[4][sq] | RAYS[5][sq] | RAYS[6][sq] | RAYS[7][sq] for sq in range(DIM * DIM)]
+
+def _line_tables() -> tuple:
+    # For two squares on the same row, column or diagonal,
+    # BETWEEN[a * 64 + b] is the squares strictly between
+    # them and LINE[a * 64 + b] is the whole line through
+    # both of them (edge to edge). Both are 0 if the squares
+    # don't line up
+    between = [0] * (DIM * DIM * DIM * DIM)
+    line = [0] * (DIM * DIM * DIM * DIM)
+    for a in range(DIM * DIM):
+        for d in range(len(RAY_DIRECTIONS)):
+            full_line = RAYS[d][a] | RAYS[OPPOSITE_DIRECTION[d]][a] | (1 << a)
+            for b in iter_bits(RAYS[d][a]):
+                between[a * 64 + b] = RAYS[d][a] & ~RAYS[d][b] & ~(1 << b)
+                line[a * 64 + b] = full_line
+    return between, line
+
+BETWEEN, LINE = _line_tables()
+
+def slider_attacks(sq:int, occupied:int, directions:tuple) -> int:
+    # Gets the attacks of a sliding piece by taking the
+    # full ray in each direction and, if something is in
+    # the way, cutting the ray off behind the closest
+    # blocker (the blocker itself stays attacked)
+    attacks = 0
+    for d in directions:
+        ray = RAYS[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE[d]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAYS[d][blocker]
+        attacks |= ray
+    return attacks
+
+def rook_attacks(sq:int, occupied:int) -> int:
+    return slider_attacks(sq, occupied, ROOK_DIRECTIONS)
+
+def bishop_attacks(sq:int, occupied:int) -> int:
+    return slider_attacks(sq, occupied, BISHOP_DIRECTIONS)
+
+def queen_attacks(sq:int, occupied:int) -> int:
+    return slider_attacks(sq, occupied, QUEEN_DIRECTIONS)
+
+def board_to_bitboards(board:list) -> dict:
+    # converts an 8x8 list of strings (ex: "wP", "  ")
+    # to a dictionary of one bitboard per piece
+    bitboards = {piece: 0 for piece in PIECES}
+    for r in range(DIM):
+        for c in range(DIM):
+            piece = board[r][c]
+            if piece != EMPTY:
+                bitboards[piece] |= 1 << square(r, c)
+    return bitboards
+
+def bitboards_to_board(bitboards:dict) -> list:
+    # converts a dictionary of piece bitboards back to
+    # the 8x8 list of strings the display code draws
+    board = [[EMPTY] * DIM for i in range(DIM)]
+    for piece, bb in bitboards.items():
+        for sq in iter_bits(bb):
+            board[sq >> 3][sq & 7] = piece
+    return board
+
+def board_from_fen(placement:str) -> list:
+    # converts the piece placement part of a FEN string
+    # (ex: "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR")
+    # to an 8x8 list of strings. Rows are listed from the
+    # top (row 0, rank 8) and numbers are empty squares
+    board = []
+    for fen_row in placement.split("/"):
+        row = []
+        for char in fen_row:
+            if char.isdigit():
+                row += [EMPTY] * int(char)
+            else:
+                team = "w" if char.isupper() else "b"
+                row.append(team + char.upper())
+        board.append(row)
+    return board
+
+def board_to_fen(board:list) -> str:
+    # converts an 8x8 list of strings to the piece placement
+    # part of a FEN string, the reverse of board_from_fen
+    fen_rows = []
+    for row in board:
+        fen_row, empty = "", 0
+        for piece in row:
+            if piece == EMPTY:
+                empty += 1
+                continue
+            if empty > 0:
+                fen_row += str(empty)
+                empty = 0
+            fen_row += piece[1] if piece[0] == "w" else piece[1].lower()
+        if empty > 0:
+            fen_row += str(empty)
+        fen_rows.append(fen_row)
+    return "/".join(fen_rows)
@@ -0,0 +1,221 @@
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+from engine import GameState
+from move import Move, PROMOTION_KEYS
+
+# Opening book for the computer.
+
+# The book is a file of 16 byte entries laid out the same way
+# as a Polyglot book (all numbers big-endian):
+#   key    - 8 bytes, zobrist key of the position
+#   move   - 2 bytes, the move (see polyglot_move)
+#   weight - 2 bytes, how often the move was played
+#   learn  - 4 bytes, unused (always 0)
+# sorted by key, so the entries of a position are found with
+# a binary search. The keys are this engine's own zobrist keys
+# (zobrist.py), not Polyglot's, so books made by other programs
+# can't be read and books made here only work with this engine.
+# The file is opened with mmap, so opening it doesn't read it
+# and a lookup only touches the few pages the search lands on.
+# Usage:
+#   python book.py build games.pgn more_games.pgn -o book.bin
+#   python book.py probe "e4 e5 Nf3"
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+# how many plies of each game go into the book
+BOOK_PLIES = 16
+
+def polyglot_move(move:Move) -> int:
+    # packs a move the Polyglot way: 3 bits each for the end
+    # file, end rank, start file, start rank, then the
+    # promotion piece. Ranks count up from rank 1 (our rows
+    # count down from rank 8) and castling is written as the
+    # king taking its own rook
+    end_col, end_row = move.end_col, move.end_row
+    if move.castling:
+        end_col = 7 if end_col == 6 else 0
+    return (end_col | (7 - end_row) << 3 | move.start_col << 6 | (7 - move.start_row) << 9
+        | PROMOTION_KEYS[move.promotion_piece] << 12)
+
+class OpeningBook:
+
+    def __init__(self, path:str):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.entries = size // ENTRY.size
+        # mmap can't map an empty file
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.entries > 0 else b""
+
+    def close(self):
+        if self.entries > 0:
+            self.data.close()
+        self.file.close()
+
+    def find(self, key:int) -> list:
+        # the (polyglot move, weight) of every entry for the
+        # position with this key, found by binary searching
+        # for the first entry with the key
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self.data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for i in range(low, self.entries):
+            entry_key, move, weight, learn = ENTRY.unpack_from(self.data, i * ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+        return moves
+
+    def get_move(self, state:GameState, rng:random.Random=random) -> Move:
+        # picks one of the book moves of the position, the more
+        # often a move was played the more likely it is picked.
+        # Returns None if the position isn't in the book
+        entries = self.find(state.key)
+        if len(entries) == 0:
+            return None
+        legal = {polyglot_move(move): move for move in state.all_legal_moves()}
+        # a different position with the same key could have
+        # moves that aren't legal here
+        choices = [(legal[move], weight) for move, weight in entries if move in legal and weight > 0]
+        if len(choices) == 0:
+            return None
+        moves, weights = zip(*choices)
+        return rng.choices(moves, weights)[0]
+
+    def __len__(self) -> int:
+        return self.entries
+
+def open_book(path:str) -> OpeningBook:
+    # opens the book, or returns None if there isn't one
+    if path is None or not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+# Reading PGN files
+
+SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+def parse_san(state:GameState, san:str) -> Move:
+    # finds the legal move written in standard algebraic
+    # notation (ex: e4, Nbd7, exd5, O-O, e8=Q+).
+    # Returns None if no legal move matches
+    san = san.rstrip("+#!?")
+    moves = state.all_legal_moves()
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        col = 6 if len(san) == 3 else 2
+        for move in moves:
+            if move.castling and move.end_col == col:
+                return move
+        return None
+    match = SAN.match(san)
+    if match is None:
+        return None
+    piece, from_file, from_rank, end, promotion = match.groups()
+    piece = piece or "P"
+    end_col, end_row = ord(end[0]) - ord("a"), 8 - int(end[1])
+    for move in moves:
+        if (move.piece_moved[1] == piece and move.end_col == end_col and move.end_row == end_row
+            and (from_file is None or move.start_col == ord(from_file) - ord("a"))
+            and (from_rank is None or move.start_row == 8 - int(from_rank))
+            and move.promotion_piece == promotion):
+            return move
+    return None
+
+def read_pgn_games(text:str):
+    # yields the list of SAN moves of every game in the PGN
+    # text, leaving out games that start from a set position
+    # and skipping comments, variations and move numbers
+    for game in re.split(r"\n\s*\n(?=\[)", text):
+        if "[FEN " in game or "[SetUp " in game:
+            continue
+        moves = re.sub(r"\[[^\]]*\]", " ", game)
+        moves = re.sub(r"\{[^}]*\}|;[^\n]*", " ", moves)
+        # variations can be nested, remove the innermost ones first
+        while "(" in moves:
+            stripped = re.sub(r"\([^()]*\)", " ", moves)
+            if stripped == moves:
+                break
+            moves = stripped
+        tokens = []
+        for token in moves.split():
+            token = re.sub(r"^\d+\.+", "", token)
+            if token == "" or token.startswith("$") or token in ("1-0", "0-1", "1/2-1/2", "*"):
+                continue
+            tokens.append(token)
+        if len(tokens) > 0:
+            yield tokens
+
+def build_book(pgn_paths:list, path:str, plies:int=BOOK_PLIES, min_count:int=1) -> tuple:
+    # plays through the first plies of every game and writes
+    # each (position, move) seen at least min_count times to
+    # the book at path. Returns (games, entries)
+    counts = {}
+    games = 0
+    for pgn_path in pgn_paths:
+        with open(pgn_path, encoding="utf-8", errors="replace") as file:
+            text = file.read()
+        for sans in read_pgn_games(text):
+            state = GameState()
+            for san in sans[:plies]:
+                move = parse_san(state, san)
+                if move is None:
+                    break
+                entry = (state.key, polyglot_move(move))
+                counts[entry] = counts.get(entry, 0) + 1
+                state.make_move(move)
+            games += 1
+
+    entries = sorted(((key, move, min(count, 0xFFFF)) for (key, move), count in counts.items()
+        if count >= min_count), key=lambda entry: (entry[0], -entry[2], entry[1]))
+    with open(path, "wb") as file:
+        for key, move, weight in entries:
+            file.write(ENTRY.pack(key, move, weight, 0))
+    return games, len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or look at the opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="make a book from PGN files")
+    build.add_argument("pgn", nargs="+")
+    build.add_argument("-o", "--output", default="book.bin")
+    build.add_argument("--plies", type=int, default=BOOK_PLIES)
+    build.add_argument("--min-count", type=int, default=1, help="leave out moves played fewer times")
+
+    probe = commands.add_parser("probe", help="show the book moves after some moves from the start")
+    probe.add_argument("moves", nargs="?", default="", help='moves from the start, ex: "e4 e5 Nf3"')
+    probe.add_argument("-b", "--book", default="book.bin")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        games, entries = build_book(args.pgn, args.output, args.plies, args.min_count)
+        print(f"{games} games, {entries} entries written to {args.output}")
+    else:
+        book = OpeningBook(args.book)
+        state = GameState()
+        for san in args.moves.split():
+            move = parse_san(state, san)
+            if move is None:
+                exit(f"{san} is not a legal move")
+            state.make_move(move)
+        legal = {polyglot_move(move): move for move in state.all_legal_moves()}
+        entries = book.find(state.key)
+        total = sum(weight for move, weight in entries)
+        for move, weight in entries:
+            name = legal[move].uci if move in legal else f"? ({move})"
+            print(f"  {name:>6} {weight:>6} {weight / total:6.1%}")
+        print(f"{len(entries)} book moves, {len(book)} entries in the book")
+        book.close()
+
+if __name__ == "__main__":
+    main()
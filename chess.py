@@ -4,10 +4,15 @@ import json
 import math
 import os
 import sprites
+import assets
+import renderer
 import computer as c
 import move as m
+import bitboard as bb
 import engine as eg
 import random
+import sys
+import traceback
 
 # Gets the config file
 path = "".join(os.path.split(__file__)[:-1])
@@ -21,6 +26,8 @@ DARK_COLOR = config["dark_square_color"]
 size = WIDTH, HEIGHT = config["resolution"]
 LIGHT_HIGHLIGHT_COLOR = config["light_highlight_color"]
 DARK_HIGHLIGHT_COLOR = config["dark_highlight_color"]
+# most seconds the computer thinks about a move
+COMPUTER_MOVE_TIME = config.get("computer_move_time", 5)
 
 # ALL CONSTANTS 
 FPS = 30
@@ -86,10 +93,24 @@ class Game:
         self.buttons = None
         self.display_promotion = False
         self.state = eg.GameState()
+        # one computer for the whole game so its
+        # transposition table is kept between moves
+        if c.SEARCH_WORKERS > 1:
+            self.computer = c.ParallelComputer(self.state)
+        else:
+            self.computer = c.Computer(self.state)
+        # the computer's search running in the background
+        # (None if the computer isn't thinking)
+        self.search = None
         self.pieces = ['wP', 'bP', 'wK', 'bK', 'wQ', 'bQ', 'wB', 'bB', 'wN', 'bN', 'wR', 'bR']
         self.min_row, self.max_row = 1, 20
 
         self.load_images()
+        # draws only the squares that changed (see renderer.py),
+        # drawn_view is what the last frame showed
+        self.renderer = renderer.BoardRenderer(self.screen, self.images, SQ_SIZE,
+            [LIGHT_COLOR, DARK_COLOR], [LIGHT_HIGHLIGHT_COLOR, DARK_HIGHLIGHT_COLOR], self.font, BG_COLOR)
+        self.drawn_view = None
         self.run()
 
     def run(self):
@@ -100,10 +121,12 @@ class Game:
             self.loop()
     
     def loop(self):
-        # Draws everything to the screen, then
-        # checks for events, then updates the screen
-        self.draw()
-        pygame.display.flip()
+        # Draws what changed to the screen and updates
+        # just those parts of the window, then checks
+        # for events
+        rects = self.draw()
+        if rects:
+            pygame.display.update(rects)
         self.check_computer_move()
         self.events()
 
@@ -116,8 +139,9 @@ class Game:
                     sprite.handle_event(event)
                     if sprite.button_down:
                         return sprite
-            self.draw()
-            pygame.display.flip()
+            rects = self.draw()
+            if rects:
+                pygame.display.update(rects)
 
     def events(self):
         # Checks for all events
@@ -136,9 +160,19 @@ class Game:
         for event in pygame.event.get():
             # Exits the program if the 'X' button is pressed
             if event.type == pygame.QUIT:
+                if self.search is not None:
+                    # the search has to be finished before the
+                    # book and bitbase files it reads are closed
+                    self.search.cancel()
+                    self.search.thread.join()
+                self.computer.close()
                 exit()
-            # Gets pos if a mouse button was clicked
-            elif event.type == pygame.MOUSEBUTTONDOWN:
+            # the window was uncovered, everything is drawn again
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.renderer.invalidate()
+            # Gets pos if a mouse button was clicked, no more
+            # moves can be played once the game is drawn
+            elif event.type == pygame.MOUSEBUTTONDOWN and not self.state.drawn_by:
                 x, y = pygame.mouse.get_pos()
                 
                 # column and row of square on chess board
@@ -150,21 +184,36 @@ class Game:
         # If the game is played against a computer
         # and it is the computers move, play the
         # computer's move
-        if self.type == "computer":
+        if self.type == "computer" and not (self.state.checkmate or self.state.stalemate or self.state.drawn_by):
             if not self.state.white_to_move and self.player_team == "w":
                 self.computer_move()
             elif self.state.white_to_move and self.player_team == "b":
                 self.computer_move()
 
     def computer_move(self):
-        # plays a "computer" move - currently
-        # just plays a random move
-        comp_num = 1 if self.state.white_to_move else -1
-        cpu = c.Computer(self.state)
-        move = cpu.get_move()
-        if move is None:
-            cpu.get_random_move()
-        self.successful_move(move)
+        # The computer's move is found with an alpha-beta
+        # search (see computer.py) that runs in the background,
+        # so the window keeps drawing and handling events.
+        # The first call starts the search, later calls (once
+        # per frame) check if it is done and play its move
+        if self.search is None:
+            self.search = c.BackgroundSearch(self.computer, self.state, COMPUTER_MOVE_TIME)
+            self.search.start()
+        elif self.search.finished:
+            search, self.search = self.search, None
+            # the board may have changed (ex: a new game started)
+            # while the computer was thinking
+            if search.cancelled or search.key != self.state.key:
+                return
+            move = search.result
+            if search.error is not None:
+                # searching again would fail the same way, so the
+                # error is shown and the first legal move played
+                print("the computer's search failed:", file=sys.stderr)
+                traceback.print_exception(type(search.error), search.error, search.error.__traceback__)
+                move = self.state.all_legal_moves()[0]
+            if move is not None:
+                self.successful_move(move)
 
     def click_on_the_board(self, row:int, col:int):
         # If same square is selected twice
@@ -200,27 +249,28 @@ class Game:
                 if (team == 'w' and self.state.white_to_move) or (team == 'b' and not self.state.white_to_move):
                     pos = self.clicks[0]
                     self.highlight_square(pos)
-                    self.moves = self.state.all_legal_moves()
+                    self.moves = self.state.legal_move_index()
                 else:
                     self.clicks = []
 
     def play_move(self):
         # 1. gets the start_square and end_square of the
         #    move from the self.clicks list
-        # 2. creates a Move object from it
-        # 3. checks if the Move object is in the legal
-        #    moves list
-        # 4. if it is, highlight the move and call the
+        # 2. looks up the legal move with the same start_square
+        #    and end_square in self.moves (pawns always promote
+        #    to a queen)
+        # 3. if there is one, highlight the move and call the
         #    the successful_move function, otherwise
         #    call the unsuccessful_move function
-        start_square = self.clicks[0][0], self.clicks[0][1]
-        end_square = self.clicks[1][0], self.clicks[1][1]
-        move = m.Move(start_square, end_square, self.state.board, self.state.move_list)
-        if move in self.moves: # if the move is legal
+        start = bb.square(*self.clicks[0])
+        end = bb.square(*self.clicks[1])
+        move = self.moves.get(m.Move.make_key(start, end))
+        if move is None:
+            move = self.moves.get(m.Move.make_key(start, end, "Q"))
+        if move is not None: # if the move is legal
             self.successful_move(move)
         else: # otherwise, the move is illegal
             self.unsuccessful_move()
-            return
 
     def game_wins(self):
         # Tells who won the game, and asks
@@ -243,34 +293,34 @@ class Game:
             exit()
 
     def successful_move(self, move:m.Move):
-        # 1. Moves the piece on the board
+        # 1. Moves the piece on the board and flips
+        #    the turn
         # 2. Checks special move types
         # 3. If the move list is long enough,
         #    the move list is automatically scrolled
         #    to the next line
         # 4. Resets self.clicks
-        # 5. Flips the turn
-        # 6. Checks if checkmate or stalemate are
-        #    on the board
-        # 7. Adds the algebraic notation of the move
+        # 5. Checks if checkmate or stalemate are
+        #    on the board, or if the game is drawn by
+        #    repetition or the fifty-move rule
+        # 6. Adds the algebraic notation of the move
         #    to the move list
         self.highlighted_square = ()
         self.highlight_move(move)
-        self.state.move_piece(move)
-        self.run_move_checks(move)
+        self.state.make_move(move)
+        notation = self.run_move_checks(move)
 
-        if self.state.white_to_move and len(self.state.move_list)/2>20:
+        if not self.state.white_to_move and len(self.state.move_list)/2>20:
             self.min_row += 1
             self.max_row += 1
 
         self.clicks = []
         self.square_selected = None
-        self.state.white_to_move = not self.state.white_to_move
         
         if self.state.is_check():
-            move.notation = move.notation + "+"
+            notation += "+"
 
-        self.state.move_list.append(move.notation)
+        self.state.move_list.append(notation)
         if len(self.state.all_legal_moves()) == 0:
             check = self.state.is_check()
             if check:
@@ -278,6 +328,10 @@ class Game:
             elif not check:
                 self.state.stalemate = True
             self.write_move_list()
+        else:
+            self.state.drawn_by = self.state.draw_reason()
+            if self.state.drawn_by:
+                self.write_move_list()
 
     def unsuccessful_move(self):
         # if the second click is not an empty space and is on the correct team
@@ -292,35 +346,17 @@ class Game:
             self.highlighted_square = ()
             self.clicks = []
 
-    def run_move_checks(self, move:m.Move):
-        # If the move is en passant, then get rid of the pawn
-        # that is "en passant-ed"
-        if move.enpassant:
-            self.state.board[move.end_row + move.ep_direction][move.end_col] = "  "
-
-        # If the move is promotion, wait for the user to
-        # input a piece to promote to, then promote the
-        # pawn to that piece and change the notation of
-        # the move for promotion
+    def run_move_checks(self, move:m.Move) -> str:
+        # The engine already takes care of the special moves
+        # when it moves the piece (removing the en passant-ed
+        # pawn, promoting to a queen and moving the castling
+        # rook), so only the notation of promotion is changed here.
+        # The move itself isn't changed since the engine keeps
+        # it in its move cache, the notation is returned instead
         if move.promotion:
-            to_promote = "Q"
-            self.state.board[move.end_row][move.end_col] = self.state.get_team() + to_promote
             self.display_promotion = False
-            move.notation = move.notation + "="
-        # if kingside castling, the rook that moves is -1 columns
-        # away from the king, otherwise that rook is +1 columns away
-        # the original rook position (a or h file) is either +1 or -2
-        # columns away
-        if move.castling:
-            if move.end_square in [(7, 6), (0, 6)]:
-                new_rook_col = -1
-                old_rook_col = 1
-            else:
-                new_rook_col = 1
-                old_rook_col = -2
-
-            self.state.board[move.end_row][move.end_col+old_rook_col] = "  "
-            self.state.board[move.end_row][move.end_col+new_rook_col] = move.piece_moved[0] + "R"
+            return move.notation + "=" + move.promotion_piece
+        return move.notation
 
     def highlight_move(self, move:m.Move):
         # highlights the move passed as a parameter
@@ -332,18 +368,13 @@ class Game:
         self.highlighted_square = (row, col)
 
     def load_images(self):
-        # loads the images necessary for the program
-        # (i.e. pieces and icon images)
-        self.icon_w = pygame.image.load(os.path.join(path, "Images", "Icon0.png"))
-        self.icon_b = pygame.image.load(os.path.join(path, "Images", "Icon1.png"))
+        # gets the images necessary for the program
+        # (i.e. pieces and icon images) from the asset cache,
+        # so they are only loaded and scaled by the first game
+        self.icon_w = assets.cache.image("Icon0")
+        self.icon_b = assets.cache.image("Icon1")
         pygame.display.set_icon(self.icon_w)
-        self.images = {}
-        for piece in self.pieces:
-            self.images[piece] = pygame.transform.scale(
-                pygame.image.load(
-                    os.path.join(path, "Themes", f"{config['theme_set']}", f"{piece}.png")),
-                    (SQ_SIZE, SQ_SIZE)
-            )
+        self.images = assets.cache.piece_images(config['theme_set'], SQ_SIZE, self.pieces)
 
     def write_move_list(self):
         i = 0
@@ -360,39 +391,25 @@ class Game:
         with open("move_list.txt", "w") as f:
             f.write(move_list)
 
-    def draw(self):
-        # draws all graphics to the window
-        self.screen.fill(BG_COLOR)
-        self.draw_board()
-        self.draw_pieces()
+    def draw(self) -> list:
+        # draws the graphics that changed since the last
+        # frame to the window, returns the rectangles drawn.
+        # If the position, highlights and message are the same
+        # as last frame nothing is drawn at all
         if self.state.checkmate:
-            self.font.render_to(self.screen, (BOARD_WIDTH/2, BOARD_HEIGHT/2), "Checkmate", (0, 0, 0))
+            message = "Checkmate"
         elif self.state.stalemate:
-            self.font.render_to(self.screen, (BOARD_WIDTH/2, BOARD_HEIGHT/2), "Stalemate", (0, 0, 0))
-
-    def draw_board(self):
-        # Draws board
-        colors = [LIGHT_COLOR, DARK_COLOR]
-        highlight_colors = [LIGHT_HIGHLIGHT_COLOR, DARK_HIGHLIGHT_COLOR]
-        for r in range(DIM):
-            for c in range(DIM):
-                # if the sum of r and c is even, the square
-                # is a light color, otherwise it is odd
-                # (ex: (0,0) is a light square, but (0,1)
-                # is a dark square)
-                index = (r + c) % 2
-                if ((r, c) == self.highlighted_square) or ((r, c) in self.highlighted_move):
-                    pygame.draw.rect(self.screen, highlight_colors[index], pygame.Rect(c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE))
-                    continue
-                pygame.draw.rect(self.screen, colors[index], pygame.Rect(c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE))
-
-    def draw_pieces(self):
-        # draws the pieces
-        for r in range(DIM):
-            for c in range(DIM):
-                piece = self.state.board[r][c]
-                if piece != "  ":
-                    self.screen.blit(self.images[piece], (SQ_SIZE*c, SQ_SIZE*r))
+            message = "Stalemate"
+        else:
+            message = self.state.drawn_by
+        view = (self.state.key, self.highlighted_square, self.highlighted_move, message)
+        if view == self.drawn_view and not self.renderer.full_redraw:
+            return []
+        self.drawn_view = view
+        highlighted = set(self.highlighted_move)
+        if self.highlighted_square:
+            highlighted.add(self.highlighted_square)
+        return self.renderer.render(self.state.board, highlighted, message)
 
 def main():
     # creates game
@@ -1,51 +1,445 @@
 import random
+import json
+import os
+import time
+import threading
 import move as m
 import engine as engine
+import transposition as tt
+import evaluation
+import book
+import bitbases
+from bitboard import EMPTY, PIECES
 from sys import maxsize
 
-DEPTH = 2
+# Gets the config file
+path = "".join(os.path.split(__file__)[:-1])
+with open(os.path.join(path, "config.json")) as file:
+    config = json.load(file)
+    file.close()
+
+DEPTH = config.get("search_depth", 4)
+NODE_LIMIT = config.get("node_limit", 200000)
+TIME_LIMIT = config.get("time_limit", None)
+QUIESCENCE_DEPTH = config.get("quiescence_depth", 8)
+SEARCH_WORKERS = config.get("search_workers", 1)
+# how deep to search once the game is in a bitbase endgame,
+# the bitbases only say who wins so the search has to find
+# the way there, but there are very few moves to search
+ENDGAME_DEPTH = config.get("endgame_depth", 6)
+# the opening book is looked for next to this file, there is
+# none until one is made with book.py
+BOOK_FILE = config.get("book_file", "book.bin")
+HASH_SIZE_MB = config.get("hash_size_mb", 16)
+HASH_POLICY = config.get("hash_policy", "two_tier")
 
 materials = {"K":0, "Q": 9, "R": 5, "B": 3, "N": 3, "P":1}
 CHECKMATE = maxsize
 STALEMATE = 0
+# scores further from 0 than this are mates, which are
+# stored in the table as "mate in n from this position"
+MATE_BOUND = CHECKMATE - 1000
+# score of a position the bitbases say is won, plus the
+# material and evaluation.mop_up score so the search still
+# makes progress (and promotes its pawn)
+KNOWN_WIN = 20000
+# how often (in nodes) the clock is looked at
+TIME_CHECK_NODES = 256
+# Move ordering scores. Alpha-beta cuts off sooner the earlier
+# the best move is tried, so moves are sorted by how likely
+# they are to be good: the table's best move, then captures
+# (most valuable victim first, cheapest attacker breaking
+# ties), then killer moves, then quiet moves by history
+HASH_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+KILLER_SCORES = (90000, 80000)
+KILLERS_PER_PLY = 2
+MAX_PLY = 64
+# a capture that can't bring the score back up to alpha even
+# with this much extra (in centipawns) is skipped in the
+# quiescence search
+DELTA_MARGIN = 200
 
 class Computer:
 
-    def __init__(self, state: engine.GameState):
+    def __init__(self, state: engine.GameState, depth:int=DEPTH, node_limit:int=NODE_LIMIT,
+        time_limit:float=TIME_LIMIT, hash_size_mb:float=HASH_SIZE_MB, hash_policy:str=HASH_POLICY,
+        move_ordering:bool=True, quiescence_depth:int=QUIESCENCE_DEPTH, book_file:str=BOOK_FILE):
+        # The search deepens one ply at a time up to depth and
+        # stops early once it has searched node_limit positions
+        # or time_limit seconds have passed (None for no limit).
+        # The transposition table is kept for as long as the
+        # Computer is, so one Computer should be used for a
+        # whole game. Without move_ordering only the table's
+        # best move is tried first (for comparing node counts).
+        # quiescence_depth is how many captures deep the search
+        # keeps going past depth, 0 turns the quiescence off.
+        # book_file is the opening book (None for no book)
         self.state = state
-        self.turn_multi = 1 if self.state.white_to_move else -1
-
-    def get_material(board:list):
-        material = 0
-        for r in board:
-            for square in r:
-                if "w" in square:
-                    material += materials[square[1]]
-                elif "b" in square:
-                    material -= materials[square[1]]
-        return material
-
-    def get_move(self) -> m.Move:
-        best_choice = None
-        opp_minimax_score = CHECKMATE # worst move for opp
+        self.depth = depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.table = tt.TranspositionTable(hash_size_mb, hash_policy)
+        self.move_ordering = move_ordering
+        self.quiescence_depth = quiescence_depth
+        self.book = book.open_book(None if book_file is None else os.path.join(path, book_file))
+        # the endgame bitbases that have been made (see bitbases.py)
+        self.bitbases = bitbases.Bitbases()
+        self.endgame = False
+        # True when depth was asked for exactly (ex: UCI "go
+        # depth"), so it isn't raised to ENDGAME_DEPTH
+        self.fixed_depth = False
+        # killers[ply] holds the last quiet moves (as keys) that
+        # caused a cutoff at that ply, history[piece][square]
+        # adds up how often a quiet move of the piece to the
+        # square caused a cutoff, weighted by depth
+        self.killers = [[None] * KILLERS_PER_PLY for i in range(MAX_PLY)]
+        self.history = {piece: [0] * 64 for piece in PIECES}
+        self.nodes = 0
+        self.qnodes = 0
+        self.completed_depth = 0
+        self.best_score = 0
+        self.stopped = False
+        self.deadline = None
+        self.cancel = None
+        # called with (depth, score, best move) each time a depth
+        # of the iterative deepening finishes, ex: for UCI info
+        self.on_depth = None
+
+    def get_move(self, cancel:threading.Event=None, deadline:float=None) -> m.Move:
+        # Iterative deepening: searches to depth 1, then 2, ...
+        # until the depth or a limit is reached. A search that
+        # gets stopped part way is thrown away, so the move
+        # played is the best move of the deepest search that
+        # finished. Each search starts with the best move of
+        # the one before, which makes alpha-beta cut off more.
+        # The search also stops once the cancel event is set or
+        # time.perf_counter() passes deadline, if they are given.
+        # Positions in the opening book aren't searched at all
+        self.start_search(cancel, deadline)
+        known_move = self.lookup_move()
+        if known_move is not None:
+            return known_move
+        legal_moves = self.root_moves()
+        if len(legal_moves) == 0:
+            return None
+        best_choice = legal_moves[0]
+        for depth in range(1, self.max_depth() + 1):
+            score, move = self.search_root(legal_moves, depth)
+            if self.stopped:
+                break
+            best_choice, self.best_score = move, score
+            self.completed_depth = depth
+            if self.on_depth is not None:
+                self.on_depth(depth, score, move)
+            # the best move goes first next time
+            self.order_moves(legal_moves, move.key, 0)
+            # no point looking deeper once a mate is found
+            if abs(score) > MATE_BOUND:
+                break
+        return best_choice
+
+    def start_search(self, cancel:threading.Event=None, deadline:float=None):
+        # resets the counters, limits and move ordering
+        # tables before a search
+        self.table.new_search()
+        self.nodes = 0
+        self.qnodes = 0
+        self.completed_depth = 0
+        self.stopped = False
+        self.killers = [[None] * KILLERS_PER_PLY for i in range(MAX_PLY)]
+        self.history = {piece: [0] * 64 for piece in PIECES}
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        if deadline is not None:
+            self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+        self.cancel = cancel
+        self.endgame = len(self.bitbases) > 0 and self.bitbases.probe(self.state) is not None
+
+    def max_depth(self) -> int:
+        return max(self.depth, ENDGAME_DEPTH) if self.endgame and not self.fixed_depth else self.depth
+
+    def lookup_move(self) -> m.Move:
+        # a move from the opening book, or None if the
+        # position isn't in it (or there is no book)
+        if self.book is None:
+            return None
+        return self.book.get_move(self.state)
+
+    def probe_bitbases(self, ply:int) -> int:
+        # the score of a bitbase position from the side to
+        # move's view, or None if it isn't in the bitbases.
+        # Checkmates still score as mates
+        result = self.bitbases.probe(self.state)
+        if result is None:
+            return None
+        if result == bitbases.DRAW:
+            return STALEMATE
+        if result == bitbases.LOSS:
+            if self.state.is_check() and self.state.count_legal_moves() == 0:
+                return -CHECKMATE + ply
+            return -KNOWN_WIN - abs(self.state.get_material()) - evaluation.mop_up(self.state)
+        return KNOWN_WIN + abs(self.state.get_material()) + evaluation.mop_up(self.state)
+
+    def root_moves(self) -> list:
+        # the legal moves of the position searched, ordered
+        # for the first iteration. They are shuffled first so
+        # equally good moves aren't always played in the same
+        # order (the sorts are stable)
         legal_moves = self.state.all_legal_moves()
         random.shuffle(legal_moves)
+        entry = self.table.probe(self.state.key)
+        self.order_moves(legal_moves, None if entry is None else entry[4], 0)
+        return legal_moves
+
+    def search_root(self, legal_moves:list, depth:int, store:bool=True, alpha:int=-CHECKMATE) -> tuple:
+        # searches every root move to depth, returns the
+        # best (score, move) from the computer's side.
+        # store is False when only some of the root moves
+        # are searched, since the best of them isn't the
+        # position's real score. If alpha is given, moves are
+        # only searched well enough to know they aren't better
+        # than alpha (their score is then at most alpha)
+        beta = CHECKMATE
+        best_score, best_move = -CHECKMATE, None
         for move in legal_moves:
-            sim_board_one = self.state.create_simulated_board(move)
-            opp_moves = self.state.all_legal_moves(sim_board_one, True)
-            opp_max_score = -CHECKMATE # best move for opp
-            for opp_move in opp_moves:
-                sim_board = self.state.create_simulated_board(opp_move, sim_board_one)
-                if self.state.is_checkmate(sim_board, True):
-                    score = -self.turn_multi * CHECKMATE
-                else:
-                    score = Computer.get_material(sim_board) * -self.turn_multi
-                if score > opp_max_score:
-                    opp_max_score = score
-            if opp_max_score < opp_minimax_score:
-                opp_minimax_score = opp_max_score
-                best_choice = move
-        return best_choice
+            self.state.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            self.state.unmake_move()
+            if self.stopped:
+                break
+            if best_move is None or score > best_score:
+                best_score, best_move = score, move
+                alpha = max(alpha, score)
+        if store and not self.stopped:
+            self.table.store(self.state.key, depth, best_score, tt.EXACT, best_move.key)
+        return best_score, best_move
+
+    def negamax(self, depth:int, alpha:int, beta:int, ply:int) -> int:
+        # Alpha-beta search in negamax form: the score is always
+        # from the side to move's view, so a child's score is
+        # negated. alpha is the score the side to move already
+        # has, beta is the most the opponent will allow. Once a
+        # move reaches beta, the opponent won't let this position
+        # happen and the rest of the moves are skipped
+        self.nodes += 1
+        if self.out_of_time():
+            return 0
+        state = self.state
+        if state.repetitions[state.key] > 1 or (state.halfmove_clock >= 100 and not state.is_checkmate()):
+            # A position already reached (in the game or earlier
+            # in this line) is scored as a draw, since either side
+            # could keep repeating it, the same as the fifty-move
+            # rule. This also stops the search going round cycles
+            return STALEMATE
+        if len(self.bitbases) > 0:
+            # Positions in the bitbases aren't searched, their
+            # score is known. When the game itself is already in
+            # a bitbase endgame, only draws are cut off. The wins
+            # are still searched (with the bitbase score at the
+            # leaves) since the bits don't say how to mate
+            score = self.probe_bitbases(ply)
+            if score is not None and (not self.endgame or score == STALEMATE):
+                return score
+
+        key = self.state.key
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            hash_move = entry[4]
+            if entry[1] >= depth:
+                score = self.score_from_table(entry[2], ply)
+                if entry[3] == tt.EXACT:
+                    return score
+                if entry[3] == tt.LOWER and score >= beta:
+                    return score
+                if entry[3] == tt.UPPER and score <= alpha:
+                    return score
+
+        if depth == 0:
+            return self.quiescence(alpha, beta, ply, self.quiescence_depth)
+
+        legal_moves = self.state.all_legal_moves()
+        if len(legal_moves) == 0:
+            # mates closer to the root score higher
+            if self.state.is_check():
+                return -CHECKMATE + ply
+            return STALEMATE
+
+        self.order_moves(legal_moves, hash_move, ply)
+
+        original_alpha = alpha
+        best_score = -CHECKMATE
+        best_move = None
+        for move in legal_moves:
+            self.state.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            self.state.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if move.piece_captured == EMPTY and not move.promotion:
+                            self.store_killer(move, ply, depth)
+                        break
+
+        if best_score >= beta:
+            bound = tt.LOWER
+        elif best_score > original_alpha:
+            bound = tt.EXACT
+        else:
+            bound = tt.UPPER
+        self.table.store(key, depth, self.score_to_table(best_score, ply), bound, best_move.key)
+        return best_score
+
+    def quiescence(self, alpha:int, beta:int, ply:int, depth:int) -> int:
+        # Keeps searching captures past the end of the main
+        # search, so a position isn't scored in the middle of an
+        # exchange (ex: just after taking a pawn with the queen,
+        # before the queen gets taken back). The side to move can
+        # also not capture anything and keep the evaluation (the
+        # "stand pat" score). Captures that couldn't get back up
+        # to alpha even winning DELTA_MARGIN more are skipped
+        # (delta pruning). In check every move is searched since
+        # standing pat isn't allowed, and the search stops after
+        # depth plies either way
+        if len(self.bitbases) > 0 and not self.endgame:
+            score = self.probe_bitbases(ply)
+            if score is not None:
+                return score
+        if self.state.is_check():
+            moves = self.state.all_legal_moves()
+            if len(moves) == 0:
+                return -CHECKMATE + ply
+            stand_pat = None
+        else:
+            stand_pat = self.evaluate()
+            if depth == 0 or stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = self.state.all_legal_captures()
+        if depth == 0:
+            return self.evaluate()
+
+        self.order_moves(moves, None, ply)
+        best_score = -CHECKMATE if stand_pat is None else stand_pat
+        for move in moves:
+            if stand_pat is not None and not move.promotion:
+                gain = evaluation.PIECE_VALUES["P"] if move.enpassant else evaluation.MATERIAL_VALUES[move.piece_captured]
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+            self.qnodes += 1
+            if self.out_of_time():
+                return 0
+            self.state.make_move(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1, depth - 1)
+            self.state.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def out_of_time(self) -> bool:
+        # sets stopped once the node or time limit is reached
+        # or the search is cancelled
+        searched = self.nodes + self.qnodes
+        if searched >= self.node_limit:
+            self.stopped = True
+        elif searched % TIME_CHECK_NODES == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                self.stopped = True
+            if self.cancel is not None and self.cancel.is_set():
+                self.stopped = True
+        return self.stopped
+
+    def order_moves(self, moves:list, hash_move:int, ply:int):
+        # sorts the moves in place, best looking first
+        if not self.move_ordering:
+            # just the table's move to the front
+            if hash_move is not None:
+                for i, move in enumerate(moves):
+                    if move.key == hash_move:
+                        moves[0], moves[i] = move, moves[0]
+                        break
+            return
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        history = self.history
+
+        def score(move:m.Move) -> int:
+            key = move.key
+            if key == hash_move:
+                return HASH_MOVE_SCORE
+            victim = move.piece_captured
+            if victim != EMPTY or move.enpassant or move.promotion:
+                # MVV-LVA: en passant takes a pawn and a
+                # promotion counts as winning the new piece
+                value = materials[victim[1]] if victim != EMPTY else materials["P"] if move.enpassant else 0
+                if move.promotion:
+                    value += materials[move.promotion_piece]
+                return CAPTURE_SCORE + value * 100 - materials[move.piece_moved[1]]
+            for i, killer in enumerate(killers):
+                if key == killer:
+                    return KILLER_SCORES[i]
+            return history[move.piece_moved][move.end]
+
+        moves.sort(key=score, reverse=True)
+
+    def store_killer(self, move:m.Move, ply:int, depth:int):
+        # remembers a quiet move that caused a cutoff, both as
+        # a killer for its ply and in the history table
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move.key:
+                killers[1] = killers[0]
+                killers[0] = move.key
+        # keeps history scores below the killer scores
+        history = self.history[move.piece_moved]
+        history[move.end] = min(history[move.end] + depth * depth, KILLER_SCORES[1] - 1)
+
+    def evaluate(self) -> int:
+        # material and piece-square score from the side to
+        # move's view, see evaluation.py. In a bitbase endgame
+        # it's the bitbase score instead
+        if self.endgame:
+            score = self.probe_bitbases(0)
+            if score is not None:
+                return score
+        return evaluation.evaluate(self.state)
+
+    @staticmethod
+    def score_to_table(score:int, ply:int) -> int:
+        # mate scores count plies from the root, the table
+        # stores them counted from the position instead so
+        # they are right wherever the position comes up again
+        if score > MATE_BOUND:
+            return score + ply
+        if score < -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def score_from_table(score:int, ply:int) -> int:
+        if score > MATE_BOUND:
+            return score - ply
+        if score < -MATE_BOUND:
+            return score + ply
+        return score
+
+    def close(self):
+        # closes the opening book and bitbases,
+        # ParallelComputer also stops its worker processes here
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        self.bitbases.close()
 
     def get_random_move(self) -> m.Move:
         return random.choice(self.state.all_legal_moves())
@@ -53,3 +447,184 @@ class Computer:
     def __str__(self) -> str:
         return self.get_move().notation
 
+# the Computer of each worker process of a ParallelComputer
+_worker_computer = None
+
+def _start_worker(settings:dict, stop):
+    # makes the worker's Computer when its process starts,
+    # it and its transposition table are kept between
+    # searches. stop is a multiprocessing event shared by
+    # every worker, setting it cancels all of their searches
+    global _worker_computer
+    _worker_computer = Computer(engine.GameState(), **settings)
+    _worker_computer.stop = stop
+
+def _search_moves(state:engine.GameState, move_keys:list, depth:int, alpha:int, node_limit:int,
+    time_left:float) -> tuple:
+    # searches some of the root moves to depth in a worker,
+    # looking only for moves better than alpha.
+    # Returns (best move key, score, stopped, nodes, qnodes)
+    cpu = _worker_computer
+    cpu.state = state
+    cpu.node_limit = node_limit
+    cpu.start_search(cpu.stop, None if time_left is None else time.perf_counter() + time_left)
+    moves = state.legal_move_index()
+    score, move = cpu.search_root([moves[key] for key in move_keys], depth, False, alpha)
+    return (None if move is None else move.key, score, cpu.stopped, cpu.nodes, cpu.qnodes)
+
+class ParallelComputer(Computer):
+
+    def __init__(self, state:engine.GameState, workers:int=SEARCH_WORKERS, **settings):
+        # Searches with a pool of worker processes, so more than
+        # one core is used (threads would all wait on python's
+        # global interpreter lock). The root moves are split
+        # between the workers for each depth of the iterative
+        # deepening, and each worker searches its share with its
+        # own Computer and transposition table. Workers don't
+        # share alpha with each other, so together they search
+        # more nodes than one Computer would.
+        # settings are passed on to every Computer
+        super().__init__(state, **settings)
+        self.workers = workers
+        self.settings = dict(settings)
+        # each worker gets its share of the table size, the
+        # book is only looked at here
+        self.settings["hash_size_mb"] = settings.get("hash_size_mb", HASH_SIZE_MB) / workers
+        self.settings["book_file"] = None
+        self.pool = None
+        self.stop_event = None
+
+    def start_pool(self):
+        # the processes are started with "spawn" (the only way
+        # on Windows) so they don't copy the window or a
+        # running search thread from this process.
+        # multiprocessing is imported here since it takes longer
+        # to import than the rest of the engine, and only the
+        # ParallelComputer needs it
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        context = multiprocessing.get_context("spawn")
+        self.stop_event = context.Event()
+        self.pool = ProcessPoolExecutor(self.workers, context, _start_worker, (self.settings, self.stop_event))
+
+    def close(self):
+        super().close()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def get_move(self, cancel:threading.Event=None, deadline:float=None) -> m.Move:
+        # Iterative deepening like Computer.get_move, but every
+        # depth is split between the workers. The first (best
+        # looking) move is searched on its own first, so its
+        # score can be handed to the workers as alpha. Without
+        # it, each worker would search its moves as if nothing
+        # better had been found yet and cut off far less.
+        # The whole depth is thrown away if any worker was stopped
+        self.start_search(cancel, deadline)
+        known_move = self.lookup_move()
+        if known_move is not None:
+            return known_move
+        if self.pool is None:
+            self.start_pool()
+        self.stop_event.clear()
+        legal_moves = self.root_moves()
+        if len(legal_moves) == 0:
+            return None
+        best_choice = legal_moves[0]
+        for depth in range(1, self.max_depth() + 1):
+            result = self.search_shares([legal_moves[:1]], depth, -CHECKMATE)
+            if result is not None and len(legal_moves) > 1:
+                rest = legal_moves[1:]
+                shares = [share for share in (rest[i::self.workers] for i in range(self.workers)) if len(share) > 0]
+                better = self.search_shares(shares, depth, result[1])
+                if better is None:
+                    result = None
+                elif better[1] > result[1]:
+                    result = better
+            if result is None:
+                break
+            key, score = result
+            best_choice = next(move for move in legal_moves if move.key == key)
+            self.best_score = score
+            self.completed_depth = depth
+            if self.on_depth is not None:
+                self.on_depth(depth, score, best_choice)
+            self.order_moves(legal_moves, key, 0)
+            if abs(score) > MATE_BOUND:
+                break
+        return best_choice
+
+    def search_shares(self, shares:list, depth:int, alpha:int) -> tuple:
+        # hands each list of moves in shares to a worker and
+        # waits for all of them. Returns the (move key, score)
+        # of the best move, or None if the search was stopped
+        from concurrent.futures import wait
+        time_left = None if self.deadline is None else self.deadline - time.perf_counter()
+        # the nodes left are split between the workers
+        node_limit = (self.node_limit - self.nodes - self.qnodes) / len(shares)
+        futures = [self.pool.submit(_search_moves, self.state, [move.key for move in share], depth, alpha,
+            node_limit, time_left) for share in shares]
+        while True:
+            done, pending = wait(futures, 0.05)
+            if len(pending) == 0:
+                break
+            if self.cancel is not None and self.cancel.is_set():
+                self.stop_event.set()
+        results = [future.result() for future in futures]
+        for result in results:
+            self.nodes += result[3]
+            self.qnodes += result[4]
+        if any(result[2] for result in results):
+            self.stopped = True
+            return None
+        return max(results, key=lambda result: result[1])[:2]
+
+class BackgroundSearch:
+
+    def __init__(self, computer:Computer, state:engine.GameState, time_limit:float=None, on_done=None):
+        # Runs computer.get_move in a worker thread so the
+        # window can keep drawing while the computer thinks.
+        # The search works on a copy of the state, so the
+        # board being drawn never shows the moves being tried.
+        # key is the position searched, a result for a position
+        # that is no longer on the board shouldn't be played.
+        # on_done is called with the result from the worker
+        # thread when the search ends, if given. If get_move
+        # raises, the exception is kept in error (and result is
+        # None) for whoever started the search to deal with
+        self.computer = computer
+        self.on_done = on_done
+        self.state = state.copy()
+        self.key = state.key
+        self.time_limit = time_limit
+        self.cancel_token = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.thread.start()
+
+    def run(self):
+        self.computer.state = self.state
+        try:
+            self.result = self.computer.get_move(self.cancel_token, self.deadline)
+        except Exception as error:
+            self.error = error
+        if self.on_done is not None:
+            self.on_done(self.result)
+
+    def cancel(self):
+        # asks the search to stop, it finishes within a few
+        # hundred nodes and its result is then ignored
+        self.cancel_token.set()
+
+    @property
+    def finished(self) -> bool:
+        return not self.thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_token.is_set()
@@ -1,30 +1,95 @@
-from move import Move
+from move import Move, ENPASSANT, CASTLING, PROMOTION
+from bitboard import (EMPTY, PIECES, PIECE_TYPES, TEAMS, FULL, square, row_col, iter_bits, lsb, popcount,
+    PAWN_ATTACKS, KNIGHT_ATTACKS, KING_ATTACKS, rook_attacks, bishop_attacks, queen_attacks,
+    BETWEEN, LINE, ROOK_LINES, BISHOP_LINES, board_to_bitboards, bitboards_to_board, board_from_fen, board_to_fen)
+from zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_KEYS
+from evaluation import MATERIAL_VALUES, PIECE_SQUARE_VALUES, score_position
+from move_cache import MoveCache
 import random
 
 DIM = 8
 GREEN = 0, 255, 0
 RED = 255, 0, 0
 
-w_pawn_moves_that_allow_ep = ["a4", "b4", "c4", "d4", "e4", "f4", "g4", "h4"]
-b_pawn_moves_that_allow_ep = ["a5", "b5", "c5", "d5", "e5", "f5", "g5", "h5"]
-
-material_dictionary = {
-    "Q" : 9,
-    "R" : 5,
-    "B" : 3,
-    "N" : 3,
-    "P" : 1
-}
+PROMOTION_PIECES = ["Q", "R", "B", "N"]
+# the pieces of each team, in the order they are checked
+PIECES_BY_TEAM = {team: [team + piece for piece in PIECE_TYPES] for team in TEAMS}
+# rows 0 and 7, where pawns promote
+PROMOTION_ROWS = 0xFF | (0xFF << 56)
+
+# castling rights bits
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_LETTERS = {"K": WHITE_KINGSIDE, "Q": WHITE_QUEENSIDE, "k": BLACK_KINGSIDE, "q": BLACK_QUEENSIDE}
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+# the rights that are kept when a piece moves from or to
+# each square, a king or rook leaving its starting square
+# (or a rook being captured on it) loses those rights
+CASTLING_MASKS = [ALL_CASTLING] * 64
+CASTLING_MASKS[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[63] &= ~WHITE_KINGSIDE
+CASTLING_MASKS[56] &= ~WHITE_QUEENSIDE
+CASTLING_MASKS[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[7] &= ~BLACK_KINGSIDE
+CASTLING_MASKS[0] &= ~BLACK_QUEENSIDE
 
 class GameState:
 
     def __init__(self):
         # initializes the game state with its
-        # basic attributes (board, white_to_move,
+        # basic attributes (bitboards, white_to_move,
         # move_list, etc.)
-        self.board = [["  " for i in range(8)] for i in range(8)]
+        # The position is stored as one bitboard per
+        # piece (ex: self.bitboards["wP"] has a bit set
+        # for every white pawn) plus one occupancy
+        # bitboard per team. self.board is converted from
+        # the bitboards whenever it is asked for.
+        self.bitboards = {piece: 0 for piece in PIECES}
+        self.occupancy = {"w": 0, "b": 0}
         self.white_to_move = True
         self.move_list = []
+        # undo records of every move played with make_move,
+        # each is (move, piece captured, square of the captured
+        # piece, zobrist key, castling rights, en passant square
+        # and halfmove clock before the move)
+        self.history = []
+        # castling rights as bits (WHITE_KINGSIDE, etc.) and the
+        # square a pawn just skipped over with a two square move
+        # (or None), both changed by make_move so finding the
+        # legal moves never has to look back through the history
+        self.castling = 0
+        self.enpassant = None
+        # moves since the last capture or pawn move, and the
+        # plies played before the position was set up (from the
+        # move number of a FEN string), both only used for FEN
+        self.halfmove_clock = 0
+        self.start_ply = 0
+        # how many times each zobrist key has been reached in
+        # this game (the keys saved in the history plus the
+        # current one), so a repeated position is found with one
+        # lookup instead of going back through the history
+        self.repetitions = {}
+        # legal moves of recently seen positions (see move_cache.py)
+        self.move_cache = MoveCache()
+        # zobrist key of the position (see zobrist.py), kept
+        # up to date by make_move and unmake_move
+        self.key = 0
+        # each team's material and piece-square score in
+        # centipawns (see evaluation.py), also kept up to date
+        # by make_move and unmake_move
+        self.material = {"w": 0, "b": 0}
+        self.position = {"w": 0, "b": 0}
+        self.bind_funcs()
+        self.checkmate, self.stalemate = False, False
+        # why the game was drawn by rule (see draw_reason), or None
+        self.drawn_by = None
+        self.create_start_pos()
+        #self.example_pos()
+
+    def bind_funcs(self):
+        # maps each piece letter to its move function
         self.funcs = {
             "P": self.get_pawn_moves,
             "R": self.get_rook_moves,
@@ -33,9 +98,6 @@ class GameState:
             "Q": self.get_queen_moves,
             "N": self.get_knight_moves
         }
-        self.checkmate, self.stalemate = False, False
-        self.create_start_pos()
-        #self.example_pos()
 
     def reset_game(self):
         # resets the game state by reinitializing it
@@ -43,144 +105,646 @@ class GameState:
         self.__init__()
         self.create_start_pos()
 
+    @property
+    def board(self) -> list:
+        # 8x8 list of strings (ex: "wP", "  ") made from
+        # the bitboards, used by the display code
+        return bitboards_to_board(self.bitboards)
+
+    @board.setter
+    def board(self, board:list):
+        self.set_board(board)
+
+    def set_board(self, board:list):
+        # loads an 8x8 list of strings into the bitboards.
+        # There is no move before the position, so there is
+        # no en passant square and a side can castle if its
+        # king and rook are still on their starting squares
+        self.bitboards = board_to_bitboards(board)
+        self.update_occupancy()
+        self.castling = self.starting_castling_rights()
+        self.enpassant = None
+        self.halfmove_clock = 0
+        self.key = self.compute_key()
+        self.repetitions = {self.key: 1}
+        self.material, self.position = score_position(self.bitboards)
+
+    @classmethod
+    def from_fen(cls, fen:str):
+        # makes a game state from a FEN string, ex:
+        # "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+        # Only the piece placement and side to move are needed,
+        # the castling rights default to what the placement
+        # allows and the rest to no en passant and move 1
+        fields = fen.split()
+        if len(fields) < 2 or fields[1] not in ("w", "b"):
+            raise ValueError(f"invalid FEN {fen!r}, expected the piece placement and side to move")
+        placement, side = fields[:2]
+        castling, enpassant, halfmove, fullmove = (fields[2:] + [None] * 4)[:4]
+        board = board_from_fen(placement)
+        if len(board) != DIM or any(len(row) != DIM for row in board) or \
+            any(piece != EMPTY and piece not in PIECES for row in board for piece in row):
+            raise ValueError(f"invalid FEN piece placement {placement!r}")
+        # the move generator needs both kings
+        for king in ("wK", "bK"):
+            if sum(row.count(king) for row in board) != 1:
+                raise ValueError(f"invalid FEN piece placement {placement!r}, expected one {king}")
+        # a pawn on the first or last row would have promoted
+        if any(piece[1] == "P" for piece in board[0] + board[DIM - 1]):
+            raise ValueError(f"invalid FEN piece placement {placement!r}, pawn on the first or last row")
+
+        state = cls()
+        state.white_to_move = side == "w"
+        state.set_board(board)
+        # the side that just moved can't have left its king in
+        # check, its king could be taken
+        if state.is_check(True):
+            raise ValueError(f"invalid FEN {fen!r}, the side not to move is in check")
+        if castling is not None and castling != "-":
+            if any(letter not in CASTLING_LETTERS for letter in castling):
+                raise ValueError(f"invalid FEN castling rights {castling!r}")
+            # rights for a king or rook that isn't there are dropped
+            state.castling &= sum(CASTLING_LETTERS[letter] for letter in set(castling))
+        elif castling == "-":
+            state.castling = 0
+        if enpassant is not None and enpassant != "-":
+            ep_row = 2 if state.white_to_move else 5
+            if len(enpassant) != 2 or enpassant[0] not in "abcdefgh" or enpassant[1] != str(DIM - ep_row):
+                raise ValueError(f"invalid FEN en passant square {enpassant!r}")
+            ep_square = square(ep_row, ord(enpassant[0]) - ord("a"))
+            # the pawn that just moved two squares has to be in
+            # front of the square, with it and the square the pawn
+            # came from empty
+            direction = DIM if state.white_to_move else -DIM
+            pawn = ("b" if state.white_to_move else "w") + "P"
+            occupied = state.occupied
+            if occupied >> ep_square & 1 or occupied >> (ep_square - direction) & 1 or \
+                not state.bitboards[pawn] >> (ep_square + direction) & 1:
+                raise ValueError(f"invalid FEN en passant square {enpassant!r}, no pawn just moved past it")
+            state.enpassant = ep_square
+        if halfmove is not None:
+            state.halfmove_clock = int(halfmove)
+        if fullmove is not None:
+            state.start_ply = 2 * (max(int(fullmove), 1) - 1) + (not state.white_to_move)
+        state.key = state.compute_key()
+        state.repetitions = {state.key: 1}
+        return state
+
+    def to_fen(self) -> str:
+        # the FEN string of the position
+        castling = "".join(letter for letter, right in CASTLING_LETTERS.items() if self.castling & right)
+        if self.enpassant is None:
+            enpassant = "-"
+        else:
+            row, col = row_col(self.enpassant)
+            enpassant = "abcdefgh"[col] + str(DIM - row)
+        fullmove = (self.start_ply + len(self.history)) // 2 + 1
+        return (f"{board_to_fen(self.board)} {'w' if self.white_to_move else 'b'} "
+            f"{castling or '-'} {enpassant} {self.halfmove_clock} {fullmove}")
+
+    def compute_key(self) -> int:
+        # works out the zobrist key of the position from
+        # scratch by XOR-ing together the key of every piece
+        # on its square, the side to move, the castling
+        # rights and the en passant file
+        key = 0
+        for piece, bb in self.bitboards.items():
+            for sq in iter_bits(bb):
+                key ^= PIECE_KEYS[piece][sq]
+        if not self.white_to_move:
+            key ^= SIDE_KEY
+        key ^= CASTLING_KEYS[self.castling]
+        ep_file = self.enpassant_file()
+        if ep_file is not None:
+            key ^= EP_KEYS[ep_file]
+        return key
+
+    def starting_castling_rights(self) -> int:
+        # the castling rights worked out from where the pieces
+        # stand, a side can castle if its king and rook are
+        # on their starting squares
+        bitboards = self.bitboards
+        rights = 0
+        if bitboards["wK"] >> 60 & 1:
+            if bitboards["wR"] >> 63 & 1:
+                rights |= WHITE_KINGSIDE
+            if bitboards["wR"] >> 56 & 1:
+                rights |= WHITE_QUEENSIDE
+        if bitboards["bK"] >> 4 & 1:
+            if bitboards["bR"] >> 7 & 1:
+                rights |= BLACK_KINGSIDE
+            if bitboards["bR"] & 1:
+                rights |= BLACK_QUEENSIDE
+        return rights
+
+    def enpassant_file(self):
+        # the column of a pawn that can be captured en passant,
+        # or None. Like the polyglot opening book format, this is
+        # only set if a pawn of the side to move is beside it
+        if self.enpassant is None:
+            return None
+        team = "w" if self.white_to_move else "b"
+        opposing_team = "b" if self.white_to_move else "w"
+        if PAWN_ATTACKS[opposing_team][self.enpassant] & self.bitboards[team + "P"]:
+            return self.enpassant & 7
+        return None
+
+    def update_occupancy(self):
+        # recomputes the occupancy bitboard of each team
+        for team in TEAMS:
+            occupied = 0
+            for piece in PIECE_TYPES:
+                occupied |= self.bitboards[team + piece]
+            self.occupancy[team] = occupied
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy["w"] | self.occupancy["b"]
+
+    def copy(self):
+        # makes a copy of the game state, the bitboards
+        # are just ints so copying them is cheap
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.bitboards = self.bitboards.copy()
+        state.occupancy = self.occupancy.copy()
+        state.material = self.material.copy()
+        state.position = self.position.copy()
+        state.history = self.history.copy()
+        state.repetitions = self.repetitions.copy()
+        # the copy can be used on another thread, so it gets
+        # its own cache
+        state.move_cache = MoveCache(self.move_cache.size) if self.move_cache is not None else None
+        state.bind_funcs()
+        return state
+
+    def __getstate__(self) -> dict:
+        # funcs holds methods bound to this state, so it is left
+        # out when pickling (ex: sending the state to another
+        # process) and bound again when unpickling
+        state = self.__dict__.copy()
+        del state["funcs"]
+        # the cached moves aren't worth sending either, only
+        # the cache's size
+        if state["move_cache"] is not None:
+            state["move_cache"] = state["move_cache"].size
+        return state
+
+    def __setstate__(self, state:dict):
+        self.__dict__.update(state)
+        if self.move_cache is not None:
+            self.move_cache = MoveCache(self.move_cache)
+        self.bind_funcs()
+
     def create_start_pos(self):
         # creates the normal start position of any chess game
-        self.board[0] = ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR']
-        self.board[1] = ['bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP']
-        self.board[2] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[3] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[4] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[5] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[6] = ['wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP']
-        self.board[7] = ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR']    
+        board = [["  " for i in range(8)] for i in range(8)]
+        board[0] = ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR']
+        board[1] = ['bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP']
+        board[6] = ['wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP']
+        board[7] = ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR']
+        self.set_board(board)
 
     def example_pos(self):
-        self.board[0] = ['  ', '  ', '  ', '  ', 'bK', '  ', '  ', '  ']
-        self.board[1] = ['  ', 'wQ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[2] = ['wQ', '  ', '  ', '  ', 'wK', '  ', '  ', '  ']
-        self.board[3] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[4] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[5] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[6] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        self.board[7] = ['  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']    
-
-    def move_piece(self, move:Move, board:list=None):
-        # moves the piece on the given board by
-        # making the start_square empty and the
-        # end_square the piece
-        if board == None:
-            board = self.board
-        board[move.start_row][move.start_col] = "  "
-        board[move.end_row][move.end_col] = move.piece_moved
-
-    def all_legal_moves(self, board:list=None, flip_color:bool=False) -> list:
-        # finds all legal moves by 
-        # 1. Finding all possible moves in the position
-        # 2. creating a simulated board for each move
-        #    (making a copy of the current board, 
-        #    then playing the move on that sim board)
-        # 3. Gets the king's position, then checks if the
-        #    king is attacked by any piece on the sim board
-        # 4. If it is, the move is illegal, if it is not the
-        #    move is legal
-        if board == None:
-            board = self.board
-        team = self.get_team(flip_color)
-        legal_moves = []
-        all_moves = self.all_possible_moves(board, flip_color)
-        for move in all_moves:
-            sim_board = self.create_simulated_board(move)
-            king_pos = self.get_king_pos(team, sim_board)
-            # debugging
-            if type(king_pos) != tuple:
-                print(self.board == board)
-                print("start_square :  " + str(move.start_square))
-                print("end_square :  " + str(move.end_square))
-                print(move.piece_moved)
-                print(move.piece_captured)
-            unsafe_move = self.is_square_attacked(king_pos, sim_board)
-            if not unsafe_move:
-                legal_moves.append(move)
-        return legal_moves
-
-    def all_possible_moves(self, board:list = None, flip_color:bool = False) -> list:
+        board = [["  " for i in range(8)] for i in range(8)]
+        board[0] = ['  ', '  ', '  ', '  ', 'bK', '  ', '  ', '  ']
+        board[1] = ['  ', 'wQ', '  ', '  ', '  ', '  ', '  ', '  ']
+        board[2] = ['wQ', '  ', '  ', '  ', 'wK', '  ', '  ', '  ']
+        self.set_board(board)
+
+    def piece_at(self, row:int, col:int) -> str:
+        # finds which piece is on a square by checking
+        # each bitboard of the team that occupies it
+        bit = 1 << square(row, col)
+        for team in TEAMS:
+            if self.occupancy[team] & bit:
+                for piece in PIECE_TYPES:
+                    if self.bitboards[team + piece] & bit:
+                        return team + piece
+        return EMPTY
+
+    def put_piece(self, piece:str, sq:int):
+        bit = 1 << sq
+        team = piece[0]
+        self.bitboards[piece] |= bit
+        self.occupancy[team] |= bit
+        self.key ^= PIECE_KEYS[piece][sq]
+        self.material[team] += MATERIAL_VALUES[piece]
+        self.position[team] += PIECE_SQUARE_VALUES[piece][sq]
+
+    def remove_piece(self, piece:str, sq:int):
+        bit = 1 << sq
+        team = piece[0]
+        self.bitboards[piece] &= ~bit
+        self.occupancy[team] &= ~bit
+        self.key ^= PIECE_KEYS[piece][sq]
+        self.material[team] -= MATERIAL_VALUES[piece]
+        self.position[team] -= PIECE_SQUARE_VALUES[piece][sq]
+
+    def move_piece(self, move:Move) -> tuple:
+        # moves the piece by taking it off the start square,
+        # removing whatever was captured, and putting it
+        # on the end square. Also handles the special moves
+        # (en passant, promotion and castling).
+        # Returns the piece that was captured and its square
+        # so that the move can be taken back
+        start, end = move.start, move.end
+        piece = move.piece_moved
+        team = piece[0]
+
+        # If the move is en passant, then the pawn that is
+        # "en passant-ed" is beside the start square, not on
+        # the end square
+        captured, captured_sq = move.piece_captured, end
+        if move.enpassant:
+            captured = ("b" if team == "w" else "w") + "P"
+            captured_sq = end + DIM * move.ep_direction
+        if captured != EMPTY:
+            self.remove_piece(captured, captured_sq)
+        self.remove_piece(piece, start)
+
+        # If the move is promotion the pawn becomes
+        # the promotion piece
+        if move.promotion:
+            piece = team + move.promotion_piece
+        self.put_piece(piece, end)
+
+        # if kingside castling, the rook moves from the h file
+        # to the f file, otherwise from the a file to the d file
+        if move.castling:
+            rook = team + "R"
+            if end & 7 == 6:
+                self.remove_piece(rook, end + 1)
+                self.put_piece(rook, end - 1)
+            else:
+                self.remove_piece(rook, end - 2)
+                self.put_piece(rook, end + 1)
+        return captured, captured_sq
+
+    def make_move(self, move:Move):
+        # plays the move in place, saves what is needed to
+        # take it back in self.history and flips the turn.
+        # move_piece updates the key for the pieces that moved,
+        # the side to move, castling rights and en passant
+        # file parts are swapped here
+        key = self.key
+        rights = self.castling
+        ep_file = self.enpassant_file()
+        captured, captured_sq = self.move_piece(move)
+        self.history.append((move, captured, captured_sq, key, rights, self.enpassant, self.halfmove_clock))
+        self.white_to_move = not self.white_to_move
+        if captured != EMPTY or move.piece_moved[1] == "P":
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self.castling = rights & CASTLING_MASKS[move.start] & CASTLING_MASKS[move.end]
+        if move.piece_moved[1] == "P" and abs(move.end - move.start) == 2 * DIM:
+            self.enpassant = (move.start + move.end) // 2
+        else:
+            self.enpassant = None
+
+        self.key ^= SIDE_KEY ^ CASTLING_KEYS[rights] ^ CASTLING_KEYS[self.castling]
+        if ep_file is not None:
+            self.key ^= EP_KEYS[ep_file]
+        ep_file = self.enpassant_file()
+        if ep_file is not None:
+            self.key ^= EP_KEYS[ep_file]
+        self.repetitions[self.key] = self.repetitions.get(self.key, 0) + 1
+
+    def unmake_move(self):
+        # takes back the last move played with make_move
+        # by doing everything move_piece did in reverse
+        count = self.repetitions[self.key] - 1
+        if count == 0:
+            del self.repetitions[self.key]
+        else:
+            self.repetitions[self.key] = count
+        move, captured, captured_sq, key, self.castling, self.enpassant, self.halfmove_clock = self.history.pop()
+        self.white_to_move = not self.white_to_move
+        start, end = move.start, move.end
+        team = move.piece_moved[0]
+
+        if move.castling:
+            rook = team + "R"
+            if end & 7 == 6:
+                self.remove_piece(rook, end - 1)
+                self.put_piece(rook, end + 1)
+            else:
+                self.remove_piece(rook, end + 1)
+                self.put_piece(rook, end - 2)
+
+        if move.promotion:
+            self.remove_piece(team + move.promotion_piece, end)
+        else:
+            self.remove_piece(move.piece_moved, end)
+        self.put_piece(move.piece_moved, start)
+        if captured != EMPTY:
+            self.put_piece(captured, captured_sq)
+        self.key = key
+
+    def all_legal_moves(self, flip_color:bool=False) -> list:
+        # finds all legal moves of the team whose turn
+        # it is (or the other team if flip_color is True)
+        # with generate_legal_moves. The moves of the team to
+        # move are kept in the move cache, a copy of the list
+        # is returned so the caller can reorder it
+        if flip_color or self.move_cache is None:
+            moves = []
+            self.generate_legal_moves(self.get_team(flip_color), moves)
+            return moves
+        moves = self.move_cache.get(self.key)
+        if moves is None:
+            moves = []
+            self.generate_legal_moves(self.get_team(), moves)
+            self.move_cache.put(self.key, moves)
+        return moves.copy()
+
+    def all_legal_captures(self, flip_color:bool=False) -> list:
+        # the legal captures (including en passant) and
+        # promotions, used by the computer's quiescence search
+        moves = []
+        self.generate_legal_moves(self.get_team(flip_color), moves, True)
+        return moves
+
+    def legal_move_index(self, flip_color:bool=False) -> dict:
+        # the legal moves in a dictionary keyed by Move.key,
+        # so checking if a move is legal is one lookup
+        return {move.key: move for move in self.all_legal_moves(flip_color)}
+
+    def count_legal_moves(self, flip_color:bool=False) -> int:
+        # counts the legal moves without making any Move
+        # objects (used by perft at the last depth)
+        return self.generate_legal_moves(self.get_team(flip_color), None)
+
+    def generate_legal_moves(self, team:str, moves:list, captures_only:bool=False) -> int:
+        # Generates only legal moves, without playing any of
+        # them, by working out once per position:
+        # 1. which enemy pieces give check (the checkers)
+        # 2. which of the team's pieces are pinned to the king
+        # Then:
+        # - the king can only go to squares that are not
+        #   attacked (looking through the king itself, so it
+        #   can't step back along a checking ray)
+        # - in double check only the king can move
+        # - in single check the other pieces can only capture
+        #   the checker or block between it and the king
+        # - a pinned piece can only move along its pin line
+        # En passant is the one move that is still played and
+        # taken back to test, since it takes two pawns off the
+        # same row at once.
+        # If moves is None, the moves are only counted. With
+        # captures_only, only captures and promotions are made.
+        # Returns the number of legal moves
+        bitboards = self.bitboards
+        opposing_team = "b" if team == "w" else "w"
+        own = self.occupancy[team]
+        occupied = own | self.occupancy[opposing_team]
+        not_own = ~own
+        wanted = self.occupancy[opposing_team] if captures_only else FULL
+        king_sq = lsb(bitboards[team + "K"])
+
+        checkers = self.attackers_of(king_sq, opposing_team, occupied)
+        pins = self.get_pins(king_sq, team)
+
+        # king moves
+        without_king = occupied ^ (1 << king_sq)
+        targets = 0
+        for sq in iter_bits(KING_ATTACKS[king_sq] & not_own & wanted):
+            if not self.is_attacked_by(sq, opposing_team, without_king):
+                targets |= 1 << sq
+        count = self.add_moves(king_sq, targets, moves, team + "K")
+
+        if checkers & (checkers - 1): # double check
+            return count
+        if checkers:
+            # capture the checker or block the check
+            mask = checkers | BETWEEN[king_sq * 64 + lsb(checkers)]
+        elif captures_only:
+            mask = FULL
+        else:
+            mask = FULL
+            for move in self.check_castling_rights(row_col(king_sq)):
+                # the king can't castle through or into check
+                passing = (move.start + move.end) // 2
+                if not self.is_attacked_by(passing, opposing_team) and not self.is_attacked_by(move.end, opposing_team):
+                    count += 1
+                    if moves is not None:
+                        moves.append(move)
+        targets_mask = not_own & mask & wanted
+
+        # knights can never move when pinned
+        for sq in iter_bits(bitboards[team + "N"]):
+            if sq not in pins:
+                count += self.add_moves(sq, KNIGHT_ATTACKS[sq] & targets_mask, moves, team + "N")
+
+        for piece, attacks in (("B", bishop_attacks), ("R", rook_attacks), ("Q", queen_attacks)):
+            for sq in iter_bits(bitboards[team + piece]):
+                targets = attacks(sq, occupied) & targets_mask
+                if sq in pins:
+                    targets &= pins[sq]
+                count += self.add_moves(sq, targets, moves, team + piece)
+
+        direction = -DIM if team == "w" else DIM
+        starting_row = 6 if team == "w" else 1
+        enemy = self.occupancy[opposing_team]
+        for sq in iter_bits(bitboards[team + "P"]):
+            one_forward = sq + direction
+            targets = 0
+            if not occupied >> one_forward & 1:
+                targets |= 1 << one_forward
+                if sq >> 3 == starting_row and not occupied >> (one_forward + direction) & 1:
+                    targets |= 1 << (one_forward + direction)
+            targets |= PAWN_ATTACKS[team][sq] & enemy
+            targets &= mask & (wanted | PROMOTION_ROWS)
+            if sq in pins:
+                targets &= pins[sq]
+            count += self.add_pawn_moves(sq, targets, moves, team)
+
+        # the pawns beside the one that just moved two squares
+        # can take it en passant, if their king isn't left in
+        # check (the move is played to find out, since two
+        # pawns leave the row at once)
+        ep_square = self.enpassant
+        if ep_square is not None and (team == "w") == self.white_to_move:
+            for sq in iter_bits(PAWN_ATTACKS[opposing_team][ep_square] & bitboards[team + "P"]):
+                move = self.create_enpassant_move(sq, (ep_square & 7) - (sq & 7), team)
+                self.make_move(move)
+                if not self.is_attacked_by(king_sq, opposing_team):
+                    count += 1
+                    if moves is not None:
+                        moves.append(move)
+                self.unmake_move()
+        return count
+
+    def get_pins(self, king_sq:int, team:str) -> dict:
+        # finds the team's pieces that are pinned to their king.
+        # Goes through the enemy rooks, bishops and queens that
+        # line up with the king, and if exactly one piece is
+        # between them and it is on the team, that piece is
+        # pinned. Returns {square: line it can still move on}
+        bitboards = self.bitboards
+        opposing_team = "b" if team == "w" else "w"
+        occupied = self.occupied
+        queens = bitboards[opposing_team + "Q"]
+        snipers = ((bitboards[opposing_team + "R"] | queens) & ROOK_LINES[king_sq]) | \
+            ((bitboards[opposing_team + "B"] | queens) & BISHOP_LINES[king_sq])
+        pins = {}
+        for sq in iter_bits(snipers):
+            between = BETWEEN[king_sq * 64 + sq] & occupied
+            if between and not between & (between - 1) and between & self.occupancy[team]:
+                pins[lsb(between)] = LINE[king_sq * 64 + sq]
+        return pins
+
+    def all_possible_moves(self, flip_color:bool = False) -> list:
         # finds all possible moves with each
-        # get_[piece]_moves function
+        # get_[piece]_moves function by going through
+        # every piece of the team's bitboards
         moves = []
-        board = self.board if board == None else board
-        for r in range(DIM):
-            for c in range(DIM):
-                square = board[r][c]
-                team = square[0]
-                if square != "  ":
-                    if (team == "w" and self.white_to_move and not flip_color) or (team == "b" and not self.white_to_move and not flip_color) or (self.white_to_move and team == "b" and flip_color) or (not self.white_to_move and team == "w" and flip_color):
-                        piece = square[1]
-                        
-                        func = self.funcs[piece]
-                        func(r, c, moves, flip_color, board)
+        team = self.get_team(flip_color)
+        for piece in PIECE_TYPES:
+            func = self.funcs[piece]
+            for sq in iter_bits(self.bitboards[team + piece]):
+                r, c = row_col(sq)
+                func(r, c, moves, flip_color)
         return moves
 
-    def get_king_pos(self, team, board=None):
-        if board == None:
-            board = self.board
-        king = team + "K"
-        for r in range(DIM):
-            for c in range(DIM):
-                if board[r][c] == king:
-                    return r, c
-
-    def get_material(self, board=None) -> int:
-        if board == None:
-            board = self.board
-        material = 0
-        for r in range(DIM):
-            for c in range(DIM):
-                if board[r][c] == "  " or "K" in board[r][c]:
-                    continue
-                team, piece = board[r][c][0], board[r][c][1]
-                value = material_dictionary[piece]
-                if team == "w":
-                    material += value
-                else:
-                    material -= value
-        return material
-
-    def is_check(self, board=None, flip_color=False) -> bool:
-        if board == None:
-            board = self.board
-        king_pos = self.get_king_pos(self.get_team(), board)
-        is_attacked = self.is_square_attacked(king_pos, board)  
+    def get_king_pos(self, team):
+        king = self.bitboards[team + "K"]
+        if king:
+            return row_col(lsb(king))
+
+    def get_material(self) -> int:
+        # white's material minus black's in centipawns,
+        # kept up to date by put_piece and remove_piece
+        return self.material["w"] - self.material["b"]
+
+    def is_check(self, flip_color=False) -> bool:
+        king_pos = self.get_king_pos(self.get_team(flip_color))
+        is_attacked = self.is_square_attacked(king_pos, flip_color)
         return is_attacked
 
-    def is_checkmate(self, board=None, flip_color=False) -> bool:
-        moves = []
-        if board == None:
-            board = self.board
-        row, col = self.get_king_pos(self.get_team(not flip_color))
-        self.get_king_moves(row, col, moves, not flip_color, board)
-        if len(moves) == 0:
-            if self.is_check(board, not flip_color):
-                return True
-        
-
-    def create_simulated_board(self, move:Move, board=None) -> list:
-        if board is None:
-            board = self.board
-        simulated = [i.copy() for i in board]
-        self.move_piece(move, simulated)
-        return simulated
-
-    def is_square_attacked(self, pos:tuple, board:list=None) -> bool:
-        if board == None:
-            board = self.board
+    def is_repetition(self, times:int=3) -> bool:
+        # whether the position has been reached at least
+        # times times (with the same side to move, castling
+        # rights and en passant file), threefold repetition
+        # by default
+        return self.repetitions.get(self.key, 0) >= times
+
+    def is_fifty_move_draw(self) -> bool:
+        # fifty moves by each side without a capture or
+        # a pawn move
+        return self.halfmove_clock >= 100
+
+    def draw_reason(self) -> str:
+        # the rule the game is drawn by, or None. A checkmate
+        # on the fiftieth move still counts, so it is looked
+        # for first
+        if self.is_fifty_move_draw() and not self.is_checkmate():
+            return "Fifty-move rule"
+        if self.is_repetition():
+            return "Threefold repetition"
+        return None
+
+    def is_checkmate(self, flip_color=False) -> bool:
+        # checkmate is when the team is in check
+        # and has no legal moves
+        if self.is_check(flip_color):
+            return len(self.all_legal_moves(flip_color)) == 0
+        return False
+
+    def is_square_attacked(self, pos:tuple, flip_color:bool=False) -> bool:
+        # checks if the square is attacked by the team
+        # opposing get_team(flip_color)
         row, col = pos
-        opp_moves = self.all_possible_moves(board, True)
-        for opp_move in opp_moves:
-            if opp_move.end_row == row and opp_move.end_col == col:
-                return True
+        return self.is_attacked_by(square(row, col), self.get_team(flip_color, True))
+
+    def is_attacked_by(self, sq:int, team:str, occupied:int=None) -> bool:
+        # checks if the square number is attacked by the team.
+        # Instead of finding every square the team attacks, this
+        # looks outward from the square itself: a knight of the
+        # team attacks it if one is a knight's move away, a pawn
+        # if one is on a square that a pawn of the other team
+        # would attack from here, and so on. The sliding pieces
+        # are found by walking the rays out from the square.
+        # occupied can be passed to look through some pieces
+        bitboards = self.bitboards
+        opposing_team = "b" if team == "w" else "w"
+        if PAWN_ATTACKS[opposing_team][sq] & bitboards[team + "P"]:
+            return True
+        if KNIGHT_ATTACKS[sq] & bitboards[team + "N"]:
+            return True
+        if KING_ATTACKS[sq] & bitboards[team + "K"]:
+            return True
+        if occupied is None:
+            occupied = self.occupied
+        queens = bitboards[team + "Q"]
+        rooks = (bitboards[team + "R"] | queens) & ROOK_LINES[sq]
+        if rooks and rook_attacks(sq, occupied) & rooks:
+            return True
+        bishops = (bitboards[team + "B"] | queens) & BISHOP_LINES[sq]
+        if bishops and bishop_attacks(sq, occupied) & bishops:
+            return True
         return False
 
-    def get_pawn_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
+    def attackers_of(self, sq:int, team:str, occupied:int=None) -> int:
+        # same as is_attacked_by, but returns a bitboard of
+        # every piece of the team that attacks the square
+        bitboards = self.bitboards
+        opposing_team = "b" if team == "w" else "w"
+        if occupied is None:
+            occupied = self.occupied
+        queens = bitboards[team + "Q"]
+        attackers = (PAWN_ATTACKS[opposing_team][sq] & bitboards[team + "P"]) | \
+            (KNIGHT_ATTACKS[sq] & bitboards[team + "N"]) | \
+            (KING_ATTACKS[sq] & bitboards[team + "K"])
+        rooks = (bitboards[team + "R"] | queens) & ROOK_LINES[sq]
+        if rooks:
+            attackers |= rook_attacks(sq, occupied) & rooks
+        bishops = (bitboards[team + "B"] | queens) & BISHOP_LINES[sq]
+        if bishops:
+            attackers |= bishop_attacks(sq, occupied) & bishops
+        return attackers
+
+    def get_attacks(self, team:str) -> int:
+        # makes a bitboard of every square the team
+        # attacks by combining the attacks of
+        # each of its pieces
+        occupied = self.occupied
+        attacks = 0
+        for sq in iter_bits(self.bitboards[team + "P"]):
+            attacks |= PAWN_ATTACKS[team][sq]
+        for sq in iter_bits(self.bitboards[team + "N"]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(self.bitboards[team + "B"]):
+            attacks |= bishop_attacks(sq, occupied)
+        for sq in iter_bits(self.bitboards[team + "R"]):
+            attacks |= rook_attacks(sq, occupied)
+        for sq in iter_bits(self.bitboards[team + "Q"]):
+            attacks |= queen_attacks(sq, occupied)
+        for sq in iter_bits(self.bitboards[team + "K"]):
+            attacks |= KING_ATTACKS[sq]
+        return attacks
+
+    def add_moves(self, start:int, targets:int, moves:list, piece:str) -> int:
+        # adds a move of the piece from the start square number
+        # to every square set in the targets bitboard.
+        # Returns how many moves there are, if moves is None
+        # they are only counted
+        if moves is None:
+            return popcount(targets)
+        bitboards = self.bitboards
+        opposing_team = "b" if piece[0] == "w" else "w"
+        captures = targets & self.occupancy[opposing_team]
+        for sq in iter_bits(targets):
+            captured = EMPTY
+            if captures >> sq & 1:
+                for captured in PIECES_BY_TEAM[opposing_team]:
+                    if bitboards[captured] >> sq & 1:
+                        break
+            moves.append(Move(start, sq, piece, captured))
+        return popcount(targets)
+
+    def get_pawn_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
         # gets all pawn moves by first getting
         # the direction that pawns go by
         # seeing who's turn it is, if it's
@@ -193,275 +757,146 @@ class GameState:
         # opposing piece. Also, checks if en
         # passant is legal with
         # check_enpassant()
-        board = self.board if board == None else board
-
         team = self.get_team(flip_color)
         opposing_team = self.get_team(flip_color, True)
         direction = -1 if team == 'w' else 1
+        occupied = self.occupied
 
         start_square = row, col
-        end_square = row + direction, col
-        diag_squares = [
-            (end_square[0], end_square[1]+1),
-            (end_square[0], end_square[1]-1)
-        ]
+        end_row = row + direction
+        if not 0 <= end_row < DIM:
+            return
+        targets = 0
 
-        # If the pawn is on the white team and it is
+        # check if space in front is empty, adds it to the move
+        # list if so. If the pawn is on the white team and it is
         # on the starting row (6) then it can move two
         # squares, same for the black time, but row 1
-        right_two_squares = False
-        if board[end_square[0]][end_square[1]] == "  ":
-            if team == 'w' and row == 6:
-                right_two_squares = True
-            elif team == 'b' and row == 1:
-                right_two_squares = True
-
-        # check if space in front is empty, adds it to the move
-        # list if so
-        if board[end_square[0]][end_square[1]] == '  ':
-            moves.append(Move(start_square, end_square, self.board, self.move_list))
-
-        # checks if the pawn has the right to move forward
-        # 2 squares, if so adds that to move list
-        if right_two_squares:
-            two_squares_forward = (end_square[0]+direction, end_square[1])
-            if board[two_squares_forward[0]][two_squares_forward[1]] == "  ":
-                moves.append(Move(start_square, two_squares_forward, self.board, self.move_list))
+        one_forward = 1 << square(end_row, col)
+        if not occupied & one_forward:
+            targets |= one_forward
+            if (team == 'w' and row == 6) or (team == 'b' and row == 1):
+                two_forward = 1 << square(end_row + direction, col)
+                if not occupied & two_forward:
+                    targets |= two_forward
 
         # checks if each diagonal square of the pawn
         # is occupied by an enemy piece, if so adds
         # to move list
-        for diag_square in diag_squares:
-            if DIM <= diag_square[1] or 0 > diag_square[1]:
-                continue
-            if opposing_team in board[diag_square[0]][diag_square[1]]:
-                moves.append(Move(start_square, diag_square, self.board, self.move_list))
-        
+        targets |= PAWN_ATTACKS[team][square(row, col)] & self.occupancy[opposing_team]
+
+        self.add_pawn_moves(square(row, col), targets, moves, team)
+
         # checks if en passant is legal, if so adds to move
         # list
         ep_bool, ep_direction = self.check_enpassant(start_square)
         if ep_bool:
-            ep_end_square = (end_square[0], end_square[1] + ep_direction)
-            moves.append(Move(start_square, ep_end_square, self.board, self.move_list))
-
-    def get_rook_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
-        # Gets rook moves by iteration over
-        # directions list (horizontal direciton) 
-        # and continuing
-        # adding to each direction until
-        # the loop encounters a any other piece
-        # and checks if the piece is capturable
-        # (if its from the opposing team)
-        board = self.board if board == None else board
-        directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-        start_square = row, col
-
+            moves.append(self.create_enpassant_move(square(row, col), ep_direction, team))
+
+    def add_pawn_moves(self, start:int, targets:int, moves:list, team:str) -> int:
+        # adds the pawn moves to every square in targets.
+        # if the pawn reaches the last row, it can
+        # promote to a queen, rook, bishop or knight
+        if not targets & PROMOTION_ROWS:
+            return self.add_moves(start, targets, moves, team + "P")
+        if moves is None:
+            return popcount(targets) * len(PROMOTION_PIECES)
+        promotions = []
+        self.add_moves(start, targets, promotions, team + "P")
+        for move in promotions:
+            for piece in PROMOTION_PIECES:
+                moves.append(Move(start, move.end, move.piece_moved, move.piece_captured, PROMOTION, piece))
+        return len(promotions) * len(PROMOTION_PIECES)
+
+    def create_enpassant_move(self, start:int, ep_direction:int, team:str) -> Move:
+        # makes the en passant move for the pawn on the start
+        # square capturing the pawn beside it in the
+        # ep_direction column
+        direction = -DIM if team == 'w' else DIM
+        return Move(start, start + direction + ep_direction, team + "P", EMPTY, ENPASSANT)
+
+    def get_rook_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
+        # Gets rook moves from the rook attack rays,
+        # leaving out the squares of the rook's own team
         team = self.get_team(flip_color)
-        opposing_team = self.get_team(flip_color, True)
-
-        for direction in directions:
-            r, c = direction
-            for i in range(DIM):
-                i += 1
-                if row + (r * i) > 7 or col + (c * i) > 7:
-                    break
-                end_square = end_row, end_col = row + (r * i), col + (c * i)
-                captured_piece = board[end_row][end_col]
-                if end_row < 0 or end_col < 0:
-                    break
-                if captured_piece == "  ":
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                elif opposing_team in captured_piece:
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                    break
-                else:
-                    break
-
-    def get_bishop_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
-        # Gets bishop moves by iteration over
-        # directions list (diagonal directions)
-        # and continuing
-        # adding to each direction until
-        # the loop encounters a any other piece
-        # and checks if the piece is capturable
-        # (if its from the opposing team)
-        board = self.board if board == None else board
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        start_square = row, col
+        targets = rook_attacks(square(row, col), self.occupied) & ~self.occupancy[team]
+        self.add_moves(square(row, col), targets, moves, team + "R")
 
+    def get_bishop_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
+        # Gets bishop moves from the bishop attack rays,
+        # leaving out the squares of the bishop's own team
         team = self.get_team(flip_color)
-        opposing_team = self.get_team(flip_color, True)
-        
-        for direction in directions:
-            r, c = direction
-            for i in range(DIM):
-                i += 1
-                if row + (r * i) > 7 or col + (c * i) > 7:
-                    break
-                end_square = end_row, end_col = row + (r * i), col + (c * i)
-                captured_piece = board[end_row][end_col]
-                if end_row < 0 or end_col < 0:
-                    break
-                elif captured_piece == "  ":
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                elif opposing_team in captured_piece:
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                    break
-                else:
-                    break
-
-    def get_queen_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
-        # Gets queen moves by combining logic from
-        # bishop and queen in to one function
-        board = self.board if board == None else board
-        directions = [
-            (1, 1), (1, -1), (-1, 1), (-1, -1),
-            (1, 0), (0, 1), (-1, 0), (0, -1)
-        ]
-        start_square = row, col
+        targets = bishop_attacks(square(row, col), self.occupied) & ~self.occupancy[team]
+        self.add_moves(square(row, col), targets, moves, team + "B")
 
+    def get_queen_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
+        # Gets queen moves by combining the rook
+        # and bishop rays
         team = self.get_team(flip_color)
-        opposing_team = self.get_team(flip_color, True)
+        targets = queen_attacks(square(row, col), self.occupied) & ~self.occupancy[team]
+        self.add_moves(square(row, col), targets, moves, team + "Q")
 
-        for direction in directions:
-            r, c = direction
-            for i in range(DIM):
-                i += 1
-                if row + (r * i) > 7 or col + (c * i) > 7:
-                    break
-                end_square = end_row, end_col = row + (r * i), col + (c * i)
-                captured_piece = board[end_row][end_col]
-                if end_row < 0 or end_col < 0:
-                    break
-                elif captured_piece == "  ":
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                elif opposing_team in captured_piece:
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                    break
-                else:
-                    break
-
-    def get_king_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
-        # Gets all king moves by checking if the
-        # from the start square are either occupied
-        # by nothing or by an opposing piece.
+    def get_king_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
+        # Gets all king moves from the king table,
+        # leaving out the squares of the king's own team.
         # Also checks if castling is legal with
         # self.check_castling_rights() function
-        board = self.board if board == None else board
-        directions = [
-            (1, 1), (1, -1), (-1, 1), (-1, -1),
-            (1, 0), (0, 1), (-1, 0), (0, -1)
-        ]
+        team = self.get_team(flip_color)
         start_square = row, col
-
-        opposing_team = self.get_team(flip_color, True)
-
-        for direction in directions:
-            end_square = end_row, end_col = row + direction[0], col + direction[1]
-            if end_row < 0 or end_row > 7 or end_col < 0 or end_col > 7:
-                continue
-            elif board[end_row][end_col] == "  " or opposing_team in self.board[end_row][end_col]:
-                moves.append(Move(start_square, end_square, self.board, self.move_list))
+        targets = KING_ATTACKS[square(row, col)] & ~self.occupancy[team]
+        self.add_moves(square(row, col), targets, moves, team + "K")
         legal_castling = self.check_castling_rights(start_square)
         if legal_castling != []:
             for move in legal_castling:
                 moves.append(move)
 
-    def get_knight_moves(self, row:int, col:int, moves:list, flip_color:bool=False, board:list=None):
-        # Gets all knight moves by checking if the directions 
-        # from the start square are either occupied by nothing
-        # or by an opposing piece
-        board = self.board if board == None else board
-        directions = [
-            (2, 1), (1, 2), 
-            (2, -1), (1, -2),
-            (-2, 1), (-1, 2),
-            (-2, -1), (-1, -2)
-        ]
-        start_square = row, col
-
-        opposing_team = self.get_team(flip_color, True)
+    def get_knight_moves(self, row:int, col:int, moves:list, flip_color:bool=False):
+        # Gets all knight moves from the knight table,
+        # leaving out the squares of the knight's own team
+        team = self.get_team(flip_color)
+        targets = KNIGHT_ATTACKS[square(row, col)] & ~self.occupancy[team]
+        self.add_moves(square(row, col), targets, moves, team + "N")
 
-        for direction in directions:
-            end_square = end_row, end_col = row + direction[0], col + direction[1]
-            if end_row < 0 or end_row > 7 or end_col < 0 or end_col > 7:
-                pass
-            else:
-                if board[end_row][end_col] == "  ":
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-                elif opposing_team in board[end_row][end_col]:
-                    moves.append(Move(start_square, end_square, self.board, self.move_list))
-    
     def check_enpassant(self, pos:tuple) -> tuple:
-        # checks if en passant is legal by checking if
-        # the last move played was a pawn up two squares
-        # and if there is a pawn on the correct row
-        # to actually play en passant
-        if len(self.move_list) == 0:
+        # checks if the pawn on pos can capture en passant:
+        # the en passant square has to be diagonally in front
+        # of it and the pawn has to be on the side to move.
+        # Returns (True, column of the captured pawn - pawn's
+        # column) or (False, False)
+        if self.enpassant is None:
             return (False, False)
-        last_move = self.move_list[-1]
-        team = self.board[pos[0]][pos[1]][0]
         row, col = pos
-
-        if team == 'w':
-            moves_ep = b_pawn_moves_that_allow_ep
-            en_passant_row = 3
-        else:
-            moves_ep = w_pawn_moves_that_allow_ep
-            en_passant_row = 4
-
-        if last_move in moves_ep:
-            file = last_move[0]
-            for move in self.move_list:
-                if file in move:
-                    i = self.move_list.index(move)
-                    if team == 'w':
-                        if i % 2 == 1 and "6" in move: # if the move was made by black
-                            continue
-                    else:
-                        if i % 2 == 0 and "3" in move:
-                            continue
-        else:
+        team = "w" if self.white_to_move else "b"
+        if not self.bitboards[team + "P"] >> square(row, col) & 1:
             return (False, False)
-        
-        if row == en_passant_row:
-            other_pawn_col = [k for k, v in Move.col_to_file.items() if v == last_move[0]][0]
-            if other_pawn_col - col == -1: # if the pawn is to the left
-                return (True, -1)
-            elif other_pawn_col - col == 1: # to the right
-                return (True, 1)
+        opposing_team = "b" if team == "w" else "w"
+        if PAWN_ATTACKS[opposing_team][self.enpassant] >> square(row, col) & 1:
+            return (True, (self.enpassant & 7) - col)
         return (False, False)
 
     def check_castling_rights(self, king_pos:tuple) -> list:
-        # checks if castling is legal on either side
-        # by checking if the king has moved from its
-        # starting square and if the rooks have
-        # moved from their starting squares
-        W_STARTING_KING_SQUARE = (7, 4)
-        B_STARTING_KING_SQUARE = (0, 4)
-
+        # finds the castling moves of the king on king_pos
+        # that its team still has the right to, if the
+        # squares between the king and the rook are empty
         legal_castling_moves = []
         row, col = king_pos
 
-        if self.white_to_move:
-            team = 'w'
-            starting_king_square = W_STARTING_KING_SQUARE
+        team = self.piece_at(row, col)[0]
+        if team == 'w':
+            kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
             starting_row = 7
         else:
-            team = 'b'
-            starting_king_square = B_STARTING_KING_SQUARE
+            kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
             starting_row = 0
-        rook = team + 'R'
-
-        if king_pos != starting_king_square:
-            return []
-
-        if self.board[starting_row][0] == rook: # check if queenside castling is legal
-            if self.board[starting_row][3] == "  " and self.board[starting_row][2] == "  ":
-                legal_castling_moves.append(Move(king_pos, (row, col-2), self.board, self.move_list))
-        if self.board[starting_row][7] == rook: # check if kingside castling is legal
-            if self.board[starting_row][5] == "  " and self.board[starting_row][6] == "  ":
-                legal_castling_moves.append(Move(king_pos, (row, col+2), self.board, self.move_list))
+        rights = self.castling
+        occupied = self.occupied
+
+        if rights & queenside: # check if queenside castling is legal
+            if not occupied & ((1 << square(starting_row, 1)) | (1 << square(starting_row, 2)) | (1 << square(starting_row, 3))):
+                legal_castling_moves.append(Move(square(row, col), square(row, col-2), team + "K", EMPTY, CASTLING))
+        if rights & kingside: # check if kingside castling is legal
+            if not occupied & ((1 << square(starting_row, 5)) | (1 << square(starting_row, 6))):
+                legal_castling_moves.append(Move(square(row, col), square(row, col+2), team + "K", EMPTY, CASTLING))
 
         return legal_castling_moves
 
@@ -0,0 +1,124 @@
+from bitboard import DIM, PIECES, iter_bits, lsb
+
+# Static evaluation for the computer's search.
+
+# A position is scored in centipawns (100 = one pawn) from
+# two parts for each team:
+#   material - the value of every piece on the board
+#   position - a bonus or penalty for the square each piece
+#              stands on (the piece-square tables below)
+# GameState keeps both parts for each team and changes them
+# in put_piece/remove_piece, so they follow make_move and
+# unmake_move and scoring a position never scans the board.
+
+PIECE_VALUES = {"P": 100, "N": 320, "B": 330, "R": 500, "Q": 900, "K": 0}
+
+# Piece-square tables from white's side, laid out like the
+# board (the first row is rank 8), so table[sq] is the bonus
+# on square sq. Black uses the table flipped top to bottom
+PIECE_SQUARE_TABLES = {
+    "P": [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0
+    ],
+    "N": [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50
+    ],
+    "B": [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20
+    ],
+    "R": [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0
+    ],
+    "Q": [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20
+    ],
+    "K": [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20
+    ]
+}
+
+# the value of each piece ("wP", "bQ", ...) and its
+# table with black's already flipped, so
+# PIECE_SQUARE_VALUES[piece][sq] is one lookup
+MATERIAL_VALUES = {piece: PIECE_VALUES[piece[1]] for piece in PIECES}
+PIECE_SQUARE_VALUES = {
+    piece: [PIECE_SQUARE_TABLES[piece[1]][sq if piece[0] == "w" else sq ^ 56] for sq in range(DIM * DIM)]
+    for piece in PIECES
+}
+
+def score_position(bitboards:dict) -> tuple:
+    # works out both parts of the score from scratch,
+    # returns ({team: material}, {team: position})
+    material = {"w": 0, "b": 0}
+    position = {"w": 0, "b": 0}
+    for piece, bb in bitboards.items():
+        for sq in iter_bits(bb):
+            material[piece[0]] += MATERIAL_VALUES[piece]
+            position[piece[0]] += PIECE_SQUARE_VALUES[piece][sq]
+    return material, position
+
+def evaluate(state) -> int:
+    # the score of the position for the side to move,
+    # read from the parts the game state keeps up to date
+    score = state.material["w"] + state.position["w"] - state.material["b"] - state.position["b"]
+    return score if state.white_to_move else -score
+
+def mop_up(state) -> int:
+    # In a won endgame with only a few pieces left, material
+    # and piece-square scores don't show how to make progress.
+    # This is the winning side's bonus for pushing the other
+    # king to the edge, bringing its own king closer and
+    # pushing its pawns (counted from the side with more
+    # material)
+    strong = "w" if state.material["w"] >= state.material["b"] else "b"
+    weak = "b" if strong == "w" else "w"
+    strong_row, strong_col = divmod(lsb(state.bitboards[strong + "K"]), DIM)
+    weak_row, weak_col = divmod(lsb(state.bitboards[weak + "K"]), DIM)
+    edge = max(3 - weak_row, weak_row - 4) + max(3 - weak_col, weak_col - 4)
+    distance = abs(strong_row - weak_row) + abs(strong_col - weak_col)
+    score = 10 * edge + 4 * (14 - distance)
+    for sq in iter_bits(state.bitboards[strong + "P"]):
+        score += 20 * (7 - sq // DIM if strong == "w" else sq // DIM)
+    return score
@@ -1,8 +1,14 @@
-class Move:
+# flags for the special kinds of moves, set by the
+# engine when it generates the move
+NORMAL = 0
+ENPASSANT = 1
+CASTLING = 2
+PROMOTION = 3
 
-    w_pawn_moves_that_allow_ep = ["a4", "b4", "c4", "d4", "e4", "f4", "g4", "h4"]
-    b_pawn_moves_that_allow_ep = ["a5", "b5", "c5", "d5", "e5", "f5", "g5", "h5"]
+# numbers for the promotion piece in a move's key
+PROMOTION_KEYS = {None: 0, "N": 1, "B": 2, "R": 3, "Q": 4}
 
+class Move:
 
     # Dictionaries that translate the grid notation
     # (starting in the top right corner with 0, 0 and going
@@ -19,27 +25,75 @@ class Move:
     row_to_rank = {7: "1", 6: "2", 5: "3", 4: "4", 3: "5", 2: "6", 1: "7", 0: "8"}
     col_to_file = {0: "a", 1: "b", 2: "c", 3: "d", 4: "e", 5: "f", 6: "g", 7: "h"}
 
-    def __init__(self, start_square:tuple, end_square:tuple, board:list, move_list:list):
-        # initalizes the move with its required attributes
-        # (board, start_square(row, col), end_square(row, col),
-        # the piece that moved, the piece/space that is being
-        # "captured", the pieces notation, etc.)
-        self.move_list = move_list
-        self.board = board
-        self.start_square = start_square
-        self.start_row, self.start_col = start_square
-        self.end_square = end_square
-        self.end_row, self.end_col = end_square
+    # Moves are made by the hundreds of thousands during a
+    # search, so they only store what the engine fills in when
+    # it generates them. __slots__ means a move has no __dict__,
+    # which makes each one a lot smaller. Everything else
+    # (rows, columns, notation, etc.) is worked out from these
+    # only when it is asked for
+    __slots__ = ("start", "end", "piece_moved", "piece_captured", "flag", "promotion_piece", "_notation")
 
-        self.piece_moved = self.board[self.start_row][self.start_col]
-        self.piece_captured = self.board[self.end_row][self.end_col]
+    def __init__(self, start:int, end:int, piece_moved:str, piece_captured:str="  ",
+        flag:int=NORMAL, promotion_piece:str=None):
+        # initalizes the move with its required attributes
+        # (start and end square numbers (row * 8 + col), the
+        # piece that moved, the piece/space that is being
+        # "captured", what kind of move it is and the piece
+        # a pawn promotes to)
+        self.start = start
+        self.end = end
+        self.piece_moved = piece_moved
+        self.piece_captured = piece_captured
+        self.flag = flag
+        self.promotion_piece = promotion_piece
+        self._notation = None
+
+    @staticmethod
+    def make_key(start:int, end:int, promotion_piece:str=None) -> int:
+        # a move is identified by its start square, end square
+        # and promotion piece, packed into one small int:
+        # 6 bits for each square and 3 for the promotion piece
+        return start | end << 6 | PROMOTION_KEYS[promotion_piece] << 12
 
-        self.enpassant, self.ep_direction = self.enpassant_tuple
+    @property
+    def key(self) -> int:
+        return self.start | self.end << 6 | PROMOTION_KEYS[self.promotion_piece] << 12
 
     def __eq__(self, other):
         # allows the move object to be compared
-        # to other move objects
-        return self.__dict__ == other.__dict__
+        # to other move objects, two moves are the
+        # same if they have the same key
+        if not isinstance(other, Move):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        # lets moves be used in sets and as dictionary keys
+        return self.key
+
+    @property
+    def start_row(self) -> int:
+        return self.start >> 3
+
+    @property
+    def start_col(self) -> int:
+        return self.start & 7
+
+    @property
+    def end_row(self) -> int:
+        return self.end >> 3
+
+    @property
+    def end_col(self) -> int:
+        return self.end & 7
+
+    @property
+    def start_square(self) -> tuple:
+        return self.start >> 3, self.start & 7
+
+    @property
+    def end_square(self) -> tuple:
+        return self.end >> 3, self.end & 7
 
     def __str__(self):
         # when printing "self", prints
@@ -47,19 +101,23 @@ class Move:
         return self.notation
 
     @property
-    def notation(self) -> bool:
+    def notation(self) -> str:
         # the algebraic notation of the move
         # ex: pawn to e4 is e4, kingside castles is O-O,
         # knight to c4 is Nc4, queen to h7 is Qh7, etc.
+        # It is only worked out the first time it is asked for
+        if self._notation is not None:
+            return self._notation
         originating_file = Move.col_to_file[self.start_col]
         file = Move.col_to_file[self.end_col]
         rank = Move.row_to_rank[self.end_row]
 
-        if self.piece_moved[1] == 'K' and self.castling:
+        if self.castling:
             if self.end_col == 6:
-                return "O-O"
+                self._notation = "O-O"
             else:
-                return "O-O-O"
+                self._notation = "O-O-O"
+            return self._notation
 
         if self.piece_moved[1] == 'P' and originating_file != file: 
             notated_piece_moved = originating_file
@@ -73,62 +131,40 @@ class Move:
         else:
             notated_piece_moved = self.piece_moved[1]
             capture_str = ''
-        return f"{notated_piece_moved}{capture_str}{file}{rank}"
+        self._notation = f"{notated_piece_moved}{capture_str}{file}{rank}"
+        return self._notation
     
     @notation.setter
     def notation(self, val):
         # set notation to the val parameter
         self._notation = val
 
+    @property
+    def uci(self) -> str:
+        # the move written as its start and end squares
+        # (ex: e2e4, or e7e8q for a promotion), which is what
+        # perft divide prints
+        start = Move.col_to_file[self.start_col] + Move.row_to_rank[self.start_row]
+        end = Move.col_to_file[self.end_col] + Move.row_to_rank[self.end_row]
+        promotion = self.promotion_piece.lower() if self.promotion else ""
+        return start + end + promotion
+
     @property
     def promotion(self) -> bool:
-        # bool for if a pawn has reached the 8th or 1st rank
-        # will promote it to a queen at the moment, this must
-        # be changed to allow for under promotion to at least
-        # a knight, however bishops and rooks should also
-        # be included
-        if self.end_row == 0 and self.piece_moved == "wP":
-            return True
-        elif self.end_row == 7 and self.piece_moved == "bP":
-            return True
-        return False
+        # bool for if a pawn has reached the 8th or 1st rank,
+        # the pawn becomes self.promotion_piece
+        return self.flag == PROMOTION
 
     @property
-    def enpassant_tuple(self) -> tuple:
-        # returns (en_passant is true bool, 
-        # en_passant direction)
-        if len(self.move_list) < 2:
-            return (False, False)
-        # If it is whites turn, then the move that allow
-        # en passant would come from black, and that would include
-        # any pawn move that goes two spaces forward
-
-        # direction is the the direction that the pawn moves
-        # in rows.
-
-        # opposite pawn is the pawn of the opposite color 
-        if self.piece_moved[0] == 'w':
-            direction = 1
-            moves_ep = Move.b_pawn_moves_that_allow_ep
-            opposite_pawn = "bP"
-        else:
-            direction = -1
-            moves_ep = Move.w_pawn_moves_that_allow_ep
-            opposite_pawn = "wP"
-        if self.move_list[-1] in moves_ep:
-            if self.piece_captured == "  " and self.piece_moved[1] == "P":
-                enpassanted_piece = self.board[self.end_row+direction][self.end_col]
-                if enpassanted_piece == opposite_pawn:
-                    return (True, direction)
-                        
-        return (False, False)
+    def enpassant(self) -> bool:
+        return self.flag == ENPASSANT
+
+    @property
+    def ep_direction(self) -> int:
+        # the rows from the end square to the pawn that is
+        # captured en passant (it is behind the end square)
+        return 1 if self.piece_moved[0] == 'w' else -1
 
     @property
     def castling(self) -> bool:
-        # Checks if the current move is castling, by
-        # checking if the piece moved is a King and
-        # if the King moved 2 columns over in this move
-        if "K" in self.piece_moved:
-            if abs(self.start_col - self.end_col) == 2:
-                return True
-        return False
+        return self.flag == CASTLING
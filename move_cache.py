@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+# Cache of the legal moves of recently seen positions.
+
+# Finding the legal moves of a position is the same work every
+# time it is asked for, and the same positions are asked about
+# again and again (every iteration of the computer's search
+# goes back through the positions of the one before, and the
+# board display asks after every move). The cache keeps the
+# move lists of the last positions, keyed by the position's
+# zobrist key (which covers the pieces, the side to move, the
+# castling rights and the en passant file, everything the
+# legal moves depend on). When it is full the position that
+# was used longest ago is dropped (least recently used).
+
+class MoveCache:
+
+    def __init__(self, size:int=2048):
+        # size is the most positions kept at once
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def get(self, key:int) -> list:
+        # the moves of the position with this key, or None if
+        # they aren't cached. Moving it to the end marks it as
+        # the most recently used
+        moves = self.entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return moves
+
+    def put(self, key:int, moves:list):
+        self.entries[key] = moves
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            # the first entry is the least recently used one
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return (f"{len(self.entries)}/{self.size} positions, {self.hits} hits, "
+            f"{self.misses} misses, {self.hit_rate:.1%} hits")
@@ -0,0 +1,113 @@
+import argparse
+import time
+from engine import GameState
+
+# Perft ("performance test") walks the tree of legal moves
+# to a fixed depth and counts the positions at the bottom.
+# The counts for these positions are well known, so if the
+# engine gets a different number its move generation is wrong.
+# Usage:
+#   python perft.py 4                  every position to depth 4
+#   python perft.py 3 -p kiwipete      one position
+#   python perft.py 3 -p start --divide
+#   python perft.py 4 --no-bulk        build Moves at the last depth too
+
+# name: (FEN, [nodes at depth 1, depth 2, ...])
+POSITIONS = {
+    "start": (
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        [20, 400, 8902, 197281, 4865609]
+    ),
+    "kiwipete": (
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603]
+    ),
+    "endgame": (
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624]
+    ),
+    "promotions": (
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333]
+    ),
+    "discovered": (
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487]
+    ),
+    "middlegame": (
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594]
+    )
+}
+
+def perft(state:GameState, depth:int, bulk:bool=True) -> int:
+    # counts the positions depth moves from this one.
+    # With bulk counting, the last depth just counts the
+    # legal moves instead of making a Move for each one
+    if depth == 0:
+        return 1
+    if depth == 1 and bulk:
+        return state.count_legal_moves()
+    nodes = 0
+    for move in state.all_legal_moves():
+        state.make_move(move)
+        nodes += perft(state, depth - 1, bulk)
+        state.unmake_move()
+    return nodes
+
+def divide(state:GameState, depth:int, bulk:bool=True) -> dict:
+    # perft split up by the first move, which makes it easy
+    # to find the move a wrong count comes from
+    counts = {}
+    for move in state.all_legal_moves():
+        state.make_move(move)
+        counts[move.uci] = perft(state, depth - 1, bulk)
+        state.unmake_move()
+    return counts
+
+def run_position(name:str, depth:int, bulk:bool, show_divide:bool) -> bool:
+    # runs perft on one of the POSITIONS and prints the
+    # nodes, time and nodes/sec, checking the node count
+    # if the reference count is known for that depth.
+    # Returns False if the count was wrong
+    fen, expected = POSITIONS[name]
+    state = GameState.from_fen(fen)
+    # perft is for timing the move generator, so the
+    # move cache is left out
+    state.move_cache = None
+    start = time.perf_counter()
+    if show_divide:
+        counts = divide(state, depth, bulk)
+        for move in sorted(counts):
+            print(f"  {move}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(state, depth, bulk)
+    elapsed = time.perf_counter() - start
+
+    if depth <= len(expected):
+        correct = nodes == expected[depth - 1]
+        result = "ok" if correct else f"WRONG, expected {expected[depth - 1]}"
+    else:
+        correct, result = True, "unchecked"
+    nps = nodes / elapsed if elapsed > 0 else 0
+    print(f"{name:>11} depth {depth}: {nodes:>9} nodes  {elapsed:7.2f}s  {nps:9.0f} nodes/s  {result}")
+    return correct
+
+def main():
+    parser = argparse.ArgumentParser(description="Count leaf nodes of the legal move tree")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("-p", "--position", choices=list(POSITIONS), action="append",
+        help="position to test (default: all of them)")
+    parser.add_argument("--divide", action="store_true", help="print the count for each first move")
+    parser.add_argument("--no-bulk", dest="bulk", action="store_false",
+        help="make every move at the last depth instead of counting them")
+    args = parser.parse_args()
+
+    names = args.position or list(POSITIONS)
+    results = [run_position(name, args.depth, args.bulk, args.divide) for name in names]
+    if not all(results):
+        exit(1)
+
+if __name__ == "__main__":
+    main()
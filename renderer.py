@@ -0,0 +1,100 @@
+import pygame
+
+# Draws the board and pieces, redrawing only what changed.
+
+# The board's squares never change colour, so they are drawn
+# once onto two background surfaces: one in the normal square
+# colours and one in the highlight colours. Drawing a square is
+# then copying it from one of them and putting its piece on
+# top. The renderer remembers what it last drew on every square
+# (the piece and whether it was highlighted), so each frame
+# only the squares that are different get drawn, and only their
+# rectangles are sent to the window with display.update(rects).
+# A frame where nothing changed draws nothing.
+
+DIM = 8
+
+class BoardRenderer:
+
+    def __init__(self, screen:pygame.Surface, images:dict, square_size:int, colors:list,
+        highlight_colors:list, font, bg_color:tuple, text_color:tuple=(0, 0, 0)):
+        # colors and highlight_colors are [light, dark]
+        self.screen = screen
+        self.images = images
+        self.square_size = square_size
+        self.font = font
+        self.text_color = text_color
+        self.background = self.make_background(bg_color, colors)
+        self.highlight_background = self.make_background(bg_color, highlight_colors)
+        self.rects = [[pygame.Rect(c * square_size, r * square_size, square_size, square_size)
+            for c in range(DIM)] for r in range(DIM)]
+        # (piece, highlighted) drawn on each square
+        self.drawn = [[None] * DIM for i in range(DIM)]
+        self.message = None
+        self.message_rect = None
+        self.full_redraw = True
+
+    def make_background(self, bg_color:tuple, colors:list) -> pygame.Surface:
+        # the whole window with the squares drawn on it, a light
+        # square is one where row + column is even
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill(bg_color)
+        size = self.square_size
+        for r in range(DIM):
+            for c in range(DIM):
+                background.fill(colors[(r + c) % 2], (c * size, r * size, size, size))
+        return background
+
+    def invalidate(self):
+        # draws everything on the next frame (ex: the window
+        # was covered up)
+        self.full_redraw = True
+
+    def render(self, board:list, highlighted:set, message:str=None) -> list:
+        # draws the squares of the board (8x8 list of pieces)
+        # that changed since the last frame, highlighted is the
+        # set of (row, col) to highlight and message is shown in
+        # the middle of the board. Returns the rectangles drawn
+        rects = []
+        if self.full_redraw or message != self.message:
+            self.screen.blit(self.background, (0, 0))
+            self.drawn = [[None] * DIM for i in range(DIM)]
+            rects.append(self.screen.get_rect())
+            self.full_redraw = False
+            self.message = message
+            self.message_rect = None
+
+        dirty = []
+        for r in range(DIM):
+            row, drawn = board[r], self.drawn[r]
+            for c in range(DIM):
+                square = (row[c], (r, c) in highlighted)
+                if drawn[c] != square:
+                    drawn[c] = square
+                    dirty.append((r, c))
+
+        redraw_message = message is not None and self.message_rect is None
+        if self.message_rect is not None and any(self.message_rect.colliderect(self.rects[r][c]) for r, c in dirty):
+            # the squares under the message are drawn again
+            # under a fresh copy of it
+            redraw_message = True
+            for r in range(DIM):
+                for c in range(DIM):
+                    if self.message_rect.colliderect(self.rects[r][c]) and (r, c) not in dirty:
+                        dirty.append((r, c))
+
+        for r, c in dirty:
+            piece, highlight = self.drawn[r][c]
+            rect = self.rects[r][c]
+            background = self.highlight_background if highlight else self.background
+            self.screen.blit(background, rect, rect)
+            if piece != "  ":
+                self.screen.blit(self.images[piece], rect)
+            rects.append(rect)
+
+        if redraw_message:
+            # the message goes on top of the squares under it
+            width, height = self.screen.get_width(), self.square_size * DIM
+            self.message_rect = self.font.render_to(self.screen, (width / 2, height / 2), message, self.text_color)
+            rects.append(self.message_rect)
+        return rects
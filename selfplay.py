@@ -0,0 +1,158 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bitboard import popcount
+from engine import GameState
+from computer import Computer, DEPTH, NODE_LIMIT, TIME_LIMIT, BOOK_FILE
+
+# Plays the computer against itself without the window.
+
+# Every game is played in a worker process (one per core by
+# default) with its own two Computers, one for each side, so
+# each keeps its own transposition table like in a real game.
+# A game ends in checkmate, stalemate, threefold repetition,
+# the fifty-move rule, when neither side has enough pieces left
+# to mate, or as a draw after max_plies. The first few moves
+# are random (the same ones for the same seed and game number)
+# so the games aren't all the same. Each result is printed as
+# soon as its game is done, with a summary at the end.
+# Usage:
+#   python selfplay.py 20                  20 games, one process per core
+#   python selfplay.py 100 -w 4 --depth 3 -o results.jsonl
+
+WHITE_WINS, BLACK_WINS, DRAW = "1-0", "0-1", "1/2-1/2"
+
+def insufficient_material(state:GameState) -> bool:
+    # only the kings, or the kings and one bishop or knight
+    bitboards = state.bitboards
+    pieces = popcount(state.occupancy["w"] | state.occupancy["b"])
+    if pieces == 2:
+        return True
+    return pieces == 3 and any(bitboards[team + piece] for team in "wb" for piece in "BN")
+
+def game_over(state:GameState) -> tuple:
+    # (result, reason) if the game has ended, otherwise None
+    if state.count_legal_moves() == 0:
+        if state.is_check():
+            return (BLACK_WINS if state.white_to_move else WHITE_WINS), "checkmate"
+        return DRAW, "stalemate"
+    reason = state.draw_reason()
+    if reason is not None:
+        return DRAW, reason.lower()
+    if insufficient_material(state):
+        return DRAW, "insufficient material"
+    return None
+
+def play_game(number:int, settings:dict, random_plies:int, max_plies:int, seed:int) -> dict:
+    # plays one game and returns what happened in it
+    rng = random.Random(f"{seed}-{number}")
+    # the computers shuffle their root moves with random
+    random.seed(rng.random())
+    state = GameState()
+    for ply in range(random_plies):
+        moves = state.all_legal_moves()
+        if len(moves) == 0:
+            break
+        state.make_move(rng.choice(moves))
+    computers = {True: Computer(state, **settings), False: Computer(state, **settings)}
+
+    moves, nodes, search_time = [], 0, 0.0
+    ended = game_over(state)
+    while ended is None and len(state.history) < max_plies:
+        cpu = computers[state.white_to_move]
+        start = time.perf_counter()
+        move = cpu.get_move()
+        search_time += time.perf_counter() - start
+        nodes += cpu.nodes + cpu.qnodes
+        moves.append(move.uci)
+        state.make_move(move)
+        ended = game_over(state)
+    for cpu in computers.values():
+        cpu.close()
+    result, reason = ended if ended is not None else (DRAW, "move limit")
+    return {
+        "game": number,
+        "result": result,
+        "reason": reason,
+        "plies": len(state.history),
+        "nodes": nodes,
+        "search_time": search_time,
+        "fen": state.to_fen(),
+        "moves": moves
+    }
+
+def run(games:int, workers:int, settings:dict, random_plies:int, max_plies:int, seed:int, output:str=None) -> dict:
+    # plays the games across a pool of processes, printing
+    # (and writing to output, one JSON line per game) each
+    # result as it comes in. Returns the summary
+    results = {WHITE_WINS: 0, BLACK_WINS: 0, DRAW: 0}
+    reasons = {}
+    nodes = plies = 0
+    search_time = 0.0
+    out = open(output, "a") if output is not None else None
+    start = time.perf_counter()
+    # "spawn" like ParallelComputer, so workers start clean
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, context) as pool:
+        futures = [pool.submit(play_game, number, settings, random_plies, max_plies, seed)
+            for number in range(games)]
+        for done, future in enumerate(as_completed(futures), 1):
+            game = future.result()
+            results[game["result"]] += 1
+            reasons[game["reason"]] = reasons.get(game["reason"], 0) + 1
+            nodes += game["nodes"]
+            plies += game["plies"]
+            search_time += game["search_time"]
+            nps = game["nodes"] / game["search_time"] if game["search_time"] > 0 else 0
+            print(f"[{done}/{games}] game {game['game']:>3}: {game['result']:>7} by {game['reason']}, "
+                f"{game['plies']} plies, {nps:.0f} nodes/s", flush=True)
+            if out is not None:
+                out.write(json.dumps(game) + "\n")
+                out.flush()
+    elapsed = time.perf_counter() - start
+    if out is not None:
+        out.close()
+    return {
+        "games": games,
+        "elapsed": elapsed,
+        "games_per_hour": games / elapsed * 3600,
+        "nodes_per_second": nodes / search_time if search_time > 0 else 0,
+        "average_plies": plies / games,
+        "results": results,
+        "reasons": reasons
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Play the computer against itself without the window")
+    parser.add_argument("games", type=int, nargs="?", default=10)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="processes (default: one per core)")
+    parser.add_argument("--depth", type=int, default=DEPTH)
+    parser.add_argument("--nodes", type=int, default=NODE_LIMIT, help="node limit per move")
+    parser.add_argument("--time", type=float, default=TIME_LIMIT, help="seconds per move (default: no limit)")
+    parser.add_argument("--random-plies", type=int, default=2, help="random moves at the start of each game")
+    parser.add_argument("--max-plies", type=int, default=300, help="the game is a draw after this many plies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-book", action="store_true", help="don't use the opening book")
+    parser.add_argument("-o", "--output", help="add each game to this file as a line of JSON")
+    args = parser.parse_args()
+
+    settings = {"depth": args.depth, "node_limit": args.nodes, "time_limit": args.time,
+        "book_file": None if args.no_book else BOOK_FILE}
+    summary = run(args.games, args.workers, settings, args.random_plies, args.max_plies, args.seed, args.output)
+
+    results = summary["results"]
+    games = summary["games"]
+    print(f"{games} games in {summary['elapsed']:.1f}s with {args.workers} workers: "
+        f"{summary['games_per_hour']:.0f} games/hour, {summary['nodes_per_second']:.0f} nodes/s per game, "
+        f"{summary['average_plies']:.0f} plies per game")
+    print(f"white {results[WHITE_WINS]} ({results[WHITE_WINS] / games:.0%}), "
+        f"black {results[BLACK_WINS]} ({results[BLACK_WINS] / games:.0%}), "
+        f"draws {results[DRAW]} ({results[DRAW] / games:.0%})")
+    print(", ".join(f"{reason} {count}" for reason, count in sorted(summary["reasons"].items(), key=lambda item: -item[1])))
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,12 @@
 import pygame as pg
-import os
+import assets
 
 pg.font.init()
 FONT = pg.font.SysFont(None, 16)
 
-path = "".join(os.path.split(__file__)[:-1])
-
-IMAGE_NORMAL = pg.image.load(os.path.join(path, "Images", "normal.png"))
-IMAGE_HOVER = pg.image.load(os.path.join(path, "Images", "hover.png"))
-IMAGE_DOWN = pg.image.load(os.path.join(path, "Images", "down.png"))
+IMAGE_NORMAL = assets.cache.image("normal")
+IMAGE_HOVER = assets.cache.image("hover")
+IMAGE_DOWN = assets.cache.image("down")
 
 class Button(pg.sprite.Sprite):
 
@@ -18,9 +16,11 @@ class Button(pg.sprite.Sprite):
         super().__init__()
 
         self.val = val
-        self.image_normal = pg.transform.scale(image_normal, (width, height))
-        self.image_hover = pg.transform.scale(image_hover, (width, height))
-        self.image_down = pg.transform.scale(image_down, (width, height))
+        # the scaled images come from the asset cache and are
+        # shared, so each button copies them to put its text on
+        self.image_normal = assets.cache.scaled(image_normal, (width, height)).copy()
+        self.image_hover = assets.cache.scaled(image_hover, (width, height)).copy()
+        self.image_down = assets.cache.scaled(image_down, (width, height)).copy()
 
         self.image = self.image_normal  # The currently active image.
         self.rect = self.image.get_rect(topleft=(x, y))
@@ -0,0 +1,33 @@
+import os
+import random
+import sys
+import pytest
+
+# the engine modules are at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import GameState
+
+def walk_random_game(seed:int, plies:int=150):
+    # plays random legal moves from the start position, then
+    # takes them all back, yielding (state, description) after
+    # every make_move and unmake_move so a test can check the
+    # state kept up to date move by move
+    rng = random.Random(seed)
+    state = GameState()
+    yield state, "start"
+    for ply in range(plies):
+        moves = state.all_legal_moves()
+        if len(moves) == 0:
+            break
+        move = rng.choice(moves)
+        state.make_move(move)
+        yield state, f"after make_move {move.uci} (ply {ply + 1})"
+    while len(state.history) > 0:
+        move = state.history[-1][0]
+        state.unmake_move()
+        yield state, f"after unmake_move {move.uci}"
+
+@pytest.fixture
+def random_game():
+    return walk_random_game
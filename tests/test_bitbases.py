@@ -0,0 +1,65 @@
+import random
+import pytest
+from bitbases import Bitbases, ENDGAMES, FOLDER, DRAW, LOSS, legal
+from bitboard import DIM, EMPTY
+from engine import GameState
+
+# the bitbases are checked against GameState: in random
+# positions of each endgame, the side to move wins if one of
+# its moves (found by GameState) leaves the other side lost,
+# and loses if all of them leave the other side winning or it
+# is checkmated. Made with python bitbases.py
+
+SAMPLES = 2000
+
+@pytest.fixture(scope="module")
+def tables():
+    tables = Bitbases()
+    yield tables
+    tables.close()
+
+def random_position(rng:random.Random, endgame:str) -> GameState:
+    # a legal position of the endgame, sometimes with black as
+    # the strong side, or None if the one drawn isn't legal
+    white_king, black_king, piece = rng.randrange(64), rng.randrange(64), rng.randrange(64)
+    if not legal(white_king, black_king, piece, endgame):
+        return None
+    state = GameState()
+    board = [[EMPTY] * DIM for i in range(DIM)]
+    strong, weak = ("w", "b") if rng.random() < 0.5 else ("b", "w")
+    flip = 0 if strong == "w" else 56
+    for sq, name in ((white_king, strong + "K"), (black_king, weak + "K"), (piece, strong + endgame[1])):
+        board[(sq ^ flip) >> 3][(sq ^ flip) & 7] = name
+    state.white_to_move = rng.random() < 0.5
+    state.set_board(board)
+    if state.is_check(True):
+        return None # the side not to move can't be in check
+    return state
+
+@pytest.mark.parametrize("endgame", ENDGAMES)
+def test_bitbase(tables, endgame):
+    if endgame not in tables.tables:
+        pytest.skip(f"no {endgame} bitbase in {FOLDER}, run python bitbases.py")
+    rng = random.Random(endgame)
+    checked = 0
+    while checked < SAMPLES:
+        state = random_position(rng, endgame)
+        if state is None:
+            continue
+        moves = state.all_legal_moves()
+        if any(move.castling for move in moves):
+            continue # the bitbases don't have castling rights
+        if len(moves) == 0:
+            expected = LOSS if state.is_check() else DRAW
+        else:
+            children = []
+            for move in moves:
+                state.make_move(move)
+                child = tables.probe(state)
+                # a capture or an under-promotion to a bishop or
+                # knight can't be won
+                children.append(DRAW if child is None else child)
+                state.unmake_move()
+            expected = -min(children)
+        assert tables.probe(state) == expected, f"{endgame}: {state.to_fen()}"
+        checked += 1
@@ -0,0 +1,70 @@
+import pytest
+import computer as c
+from engine import GameState
+from evaluation import PIECE_VALUES
+
+def play(state:GameState, *ucis):
+    for uci in ucis:
+        moves = {move.uci: move for move in state.all_legal_moves()}
+        state.make_move(moves[uci])
+
+SHUFFLE = ("g1f3", "g8f6", "f3g1", "f6g8")
+
+def test_threefold_repetition():
+    state = GameState()
+    play(state, *SHUFFLE)
+    assert state.repetitions[state.key] == 2
+    assert not state.is_repetition() and state.draw_reason() is None
+    play(state, *SHUFFLE)
+    assert state.repetitions[state.key] == 3
+    assert state.draw_reason() == "Threefold repetition"
+
+def test_unmake_restores_repetitions():
+    state = GameState()
+    play(state, *SHUFFLE, *SHUFFLE)
+    state.unmake_move()
+    state.unmake_move()
+    play(state, "f3g1", "f6g8")
+    assert state.repetitions[state.key] == 3
+    for i in range(len(SHUFFLE)):
+        state.unmake_move()
+    assert state.repetitions[state.key] == 2
+    assert state.draw_reason() is None
+    while len(state.history) > 0:
+        state.unmake_move()
+    assert state.repetitions == {state.key: 1}
+
+def test_fifty_move_rule():
+    state = GameState.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 98 80")
+    play(state, "a1a2")
+    assert state.halfmove_clock == 99 and state.draw_reason() is None
+    play(state, "e8d8")
+    assert state.halfmove_clock == 100
+    assert state.draw_reason() == "Fifty-move rule"
+    state.unmake_move()
+    assert state.halfmove_clock == 99 and state.draw_reason() is None
+
+def test_checkmate_beats_fifty_move_rule():
+    state = GameState.from_fen("7k/8/6K1/8/8/8/8/R7 w - - 99 80")
+    play(state, "a1a8")
+    assert state.halfmove_clock == 100
+    assert state.is_checkmate()
+    assert state.draw_reason() is None
+
+@pytest.fixture
+def cpu():
+    state = GameState.from_fen("4k3/8/8/8/8/8/8/QN2K3 w - - 0 1")
+    cpu = c.Computer(state, depth=2, book_file=None)
+    yield cpu
+    cpu.close()
+
+def test_search_scores_repetition_as_draw(cpu):
+    # a queen up, but going back to a position already reached
+    # is scored as a draw
+    state = cpu.state
+    cpu.start_search()
+    play(state, "b1c3")
+    assert cpu.negamax(2, -c.CHECKMATE, c.CHECKMATE, 1) < -PIECE_VALUES["Q"]
+    play(state, "e8d8", "c3b1", "d8e8", "b1c3")
+    assert state.repetitions[state.key] == 2
+    assert cpu.negamax(2, -c.CHECKMATE, c.CHECKMATE, 1) == c.STALEMATE
@@ -0,0 +1,45 @@
+import pytest
+from engine import GameState
+
+@pytest.mark.parametrize("fen", [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+    "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 12 40",
+    "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2"
+])
+def test_round_trip(fen):
+    assert GameState.from_fen(fen).to_fen() == fen
+
+def test_round_trip_after_moves(random_game):
+    # the FEN of each position makes a state with the same key
+    for state, where in random_game(0, plies=40):
+        copy = GameState.from_fen(state.to_fen())
+        assert copy.key == state.key, where
+
+@pytest.mark.parametrize("fen", [
+    # no kings, no black king, two white kings
+    "8/8/8/8/8/8/8/8 w - - 0 1",
+    "8/8/8/8/8/8/8/4K3 w - - 0 1",
+    "4k3/8/8/8/8/8/8/K3K3 w - - 0 1",
+    # an en passant square with no pawn that just moved past it
+    "4k3/8/8/3P4/8/8/8/4K3 w - e6 0 1",
+    # the square behind the pawn isn't empty
+    "4k3/3p4/8/3pP3/8/8/8/4K3 w - d6 0 1",
+    # the en passant square is on the wrong row
+    "4k3/8/8/3pP3/8/8/8/4K3 w - d3 0 1",
+    # pawns on the first or last row
+    "P3k3/8/8/8/8/8/8/4K3 w - - 0 1",
+    "4k3/8/8/8/8/8/8/p3K3 b - - 0 1",
+    # the side not to move is in check
+    "4k3/4Q3/8/8/8/8/8/4K3 w - - 0 1",
+    "4k3/8/8/8/8/3n4/8/4K3 b - - 0 1",
+    # not a FEN
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1"
+])
+def test_invalid(fen):
+    with pytest.raises(ValueError):
+        GameState.from_fen(fen)
@@ -0,0 +1,14 @@
+import pytest
+from evaluation import score_position
+
+# make_move and unmake_move keep the zobrist key and the
+# material and position scores up to date instead of working
+# them out again, so in every position of a random game they
+# have to equal the ones worked out from scratch
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_state(random_game, seed):
+    for state, where in random_game(seed):
+        assert state.key == state.compute_key(), f"game {seed}: key is wrong {where}"
+        assert (state.material, state.position) == score_position(state.bitboards), \
+            f"game {seed}: score is wrong {where}"
@@ -0,0 +1,32 @@
+from move_cache import MoveCache
+
+def test_hits_and_misses():
+    cache = MoveCache(4)
+    assert cache.get(1) is None
+    cache.put(1, ["a"])
+    assert cache.get(1) == ["a"]
+    assert cache.get(2) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate == 1 / 3
+    cache.clear()
+    assert len(cache) == 0 and (cache.hits, cache.misses) == (0, 0)
+
+def test_least_recently_used_is_dropped():
+    cache = MoveCache(3)
+    for key in range(3):
+        cache.put(key, [key])
+    # 0 is used, so 1 is now the least recently used
+    cache.get(0)
+    cache.put(3, [3])
+    assert len(cache) == 3
+    assert cache.get(1) is None
+    assert [cache.get(key) for key in (0, 2, 3)] == [[0], [2], [3]]
+
+def test_game_state_uses_cache(random_game):
+    # asking for the moves of the same position twice finds
+    # them in the cache the second time
+    for state, where in random_game(1, plies=20):
+        moves = state.all_legal_moves()
+        hits = state.move_cache.hits
+        assert state.all_legal_moves() == moves, where
+        assert state.move_cache.hits == hits + 1, where
@@ -0,0 +1,17 @@
+import pytest
+from engine import GameState
+from perft import POSITIONS, perft
+
+# the move generator has to find the well known node counts,
+# with and without bulk counting at the last depth
+
+@pytest.mark.parametrize("bulk", [True, False])
+@pytest.mark.parametrize("name", POSITIONS)
+def test_perft(name, bulk):
+    fen, expected = POSITIONS[name]
+    state = GameState.from_fen(fen)
+    # the move generator itself is tested, not the move cache
+    state.move_cache = None
+    assert perft(state, 3, bulk) == expected[2]
+    # the position is left as it was
+    assert state.to_fen() == fen
@@ -0,0 +1,55 @@
+import io
+import pytest
+import computer as c
+from uci import UCIEngine, MIN_HASH_MB, MAX_HASH_MB
+
+@pytest.mark.parametrize("value, expected", [("64", 64), ("0", MIN_HASH_MB), ("-5", MIN_HASH_MB), ("4096", MAX_HASH_MB)])
+def test_hash_is_clamped(value, expected):
+    uci = UCIEngine(io.StringIO())
+    uci.handle(f"setoption name Hash value {value}")
+    assert uci.hash_size_mb == expected
+
+def test_bad_hash_value():
+    output = io.StringIO()
+    uci = UCIEngine(output)
+    size = uci.hash_size_mb
+    assert uci.handle("setoption name Hash value lots")
+    assert uci.hash_size_mb == size
+    assert output.getvalue().startswith("info string")
+
+def test_failed_search_still_answers(monkeypatch):
+    def get_move(self, cancel_token=None, deadline=None):
+        raise RuntimeError("broken")
+    monkeypatch.setattr(c.Computer, "get_move", get_move)
+    output = io.StringIO()
+    uci = UCIEngine(output)
+    uci.handle("go depth 1")
+    uci.search.thread.join()
+    uci.handle("quit")
+    lines = output.getvalue().splitlines()
+    assert lines == ["info string search failed: RuntimeError: broken", "bestmove 0000"]
+
+def test_setoption_during_search():
+    # the search is stopped (and answers) before the Computer
+    # it uses is closed
+    output = io.StringIO()
+    uci = UCIEngine(output)
+    uci.handle("go infinite")
+    uci.handle("setoption name Hash value 8")
+    assert uci.search is None and uci.computer is None
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+    uci.handle("quit")
+
+def test_depth_is_honoured_in_endgame():
+    output = io.StringIO()
+    uci = UCIEngine(output)
+    uci.handle("setoption name OwnBook value false")
+    uci.handle("position fen 8/8/8/4k3/8/8/8/1QK5 w - - 0 1")
+    uci.handle("go depth 3")
+    uci.search.thread.join()
+    endgame = uci.computer.endgame
+    uci.handle("quit")
+    if not endgame:
+        pytest.skip("no KQK bitbase, run python bitbases.py")
+    lines = output.getvalue().splitlines()
+    assert max(int(line.split()[2]) for line in lines if line.startswith("info depth")) == 3
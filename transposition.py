@@ -0,0 +1,123 @@
+# Transposition table for the computer's search.
+
+# The same position can be reached by playing moves in a
+# different order, so the search saves what it found out
+# about each position it searched (keyed by the position's
+# zobrist key) and looks it up before searching it again.
+
+# The table has a fixed number of buckets worked out from a
+# size in MB. A position's bucket is its key modulo the number
+# of buckets and each bucket has two slots:
+#   slot 0 - "depth-preferred", only replaced by a search that
+#            went at least as deep, or if the entry is from an
+#            older search
+#   slot 1 - "always-replace", always takes the newest entry
+# so deep results stay around while new ones still get stored.
+
+# bound types, what the stored score means
+EXACT = 0 # the score is the real score
+LOWER = 1 # the real score is at least the score (beta cutoff)
+UPPER = 2 # the real score is at most the score (no move beat alpha)
+
+# rough size of one entry in a python list: the tuple, its
+# 64-bit key and score, and the list slot pointing to it
+ENTRY_BYTES = 160
+
+POLICIES = ["two_tier", "depth", "always"]
+
+class TranspositionTable:
+
+    def __init__(self, size_mb:float=16, policy:str="two_tier"):
+        # policy decides what happens when a bucket is full:
+        #   "two_tier" - a depth-preferred and an always-replace slot
+        #   "depth" - both slots are depth-preferred
+        #   "always" - both slots are always-replace
+        if policy not in POLICIES:
+            raise ValueError(f"unknown replacement policy {policy!r}, expected one of {POLICIES}")
+        self.policy = policy
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        # each entry is (key, depth, score, bound, move key, age)
+        self.entries = [None] * (self.buckets * 2)
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self):
+        self.entries = [None] * (self.buckets * 2)
+        self.age = 0
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self):
+        # called before each search, entries from older searches
+        # can then be replaced even if they went deeper
+        self.age += 1
+
+    def probe(self, key:int):
+        # returns the entry for the position with this key,
+        # or None if it isn't in the table
+        self.probes += 1
+        index = (key % self.buckets) * 2
+        for entry in (self.entries[index], self.entries[index + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        return None
+
+    def store(self, key:int, depth:int, score:int, bound:int, move_key:int=None):
+        # saves the result of searching a position
+        self.stores += 1
+        index = (key % self.buckets) * 2
+        entry = (key, depth, score, bound, move_key, self.age)
+        entries = self.entries
+
+        # the same position is always updated where it is
+        for i in (index, index + 1):
+            if entries[i] is not None and entries[i][0] == key:
+                if self.keeps(entries[i], depth, i - index):
+                    return
+                entries[i] = entry
+                return
+
+        if self.policy == "always":
+            # the newer slot moves down, like a tiny queue
+            entries[index + 1] = entries[index]
+            entries[index] = entry
+        elif self.policy == "depth":
+            # replace the shallower (or older) of the two
+            first, second = entries[index], entries[index + 1]
+            if first is None or (second is not None and self.replace_order(first) < self.replace_order(second)):
+                entries[index] = entry
+            else:
+                entries[index + 1] = entry
+        else:
+            if not self.keeps(entries[index], depth, 0):
+                # the old depth-preferred entry still goes into
+                # the always-replace slot instead of being lost
+                entries[index + 1] = entries[index]
+                entries[index] = entry
+            else:
+                entries[index + 1] = entry
+
+    def keeps(self, old:tuple, depth:int, slot:int) -> bool:
+        # whether a depth-preferred slot keeps its old entry
+        # instead of taking a new one searched to depth
+        if old is None or self.policy == "always" or (self.policy == "two_tier" and slot == 1):
+            return False
+        return old[5] == self.age and old[1] > depth
+
+    def replace_order(self, entry:tuple) -> tuple:
+        # entries from older searches go first, then shallower ones
+        return (entry[5] == self.age, entry[1])
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes > 0 else 0.0
+
+    @property
+    def used(self) -> int:
+        return sum(1 for entry in self.entries if entry is not None)
+
+    def __str__(self) -> str:
+        return (f"{self.buckets * 2} entries ({self.policy}), {self.used} used, "
+            f"{self.probes} probes, {self.hit_rate:.1%} hits")
@@ -0,0 +1,224 @@
+import sys
+import threading
+import time
+from engine import GameState
+import computer as c
+
+# UCI (Universal Chess Interface) front-end, so the engine can
+# be used from chess GUIs and testing tools. It only needs the
+# engine and the computer (no pygame or images), so it starts
+# quickly. Run with
+#   python uci.py
+# and talk to it on stdin/stdout.
+
+# Commands are read on the main thread while the search runs
+# in a BackgroundSearch thread, so "isready" and "stop" are
+# answered in the middle of a search. The search prints an
+# info line after every depth and its bestmove when it ends.
+
+NAME = "MyPersonalProject"
+AUTHOR = "Bilal Khalil"
+# deepest search for "go" with a clock or "go infinite", the
+# time or "stop" ends it long before this
+MAX_DEPTH = 30
+# milliseconds kept back from each move for reading and writing
+MOVE_OVERHEAD = 50
+# how many moves the remaining time is split over when the GUI
+# doesn't say (movestogo)
+MOVES_TO_GO = 30
+# the Hash option's range in MB, values outside it are clamped
+MIN_HASH_MB = 1
+MAX_HASH_MB = 1024
+
+class UCIEngine:
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        # the search thread and the main thread both write
+        self.output_lock = threading.Lock()
+        self.state = GameState()
+        self.hash_size_mb = c.HASH_SIZE_MB
+        self.own_book = True
+        # made on the first search, so starting up is quick
+        self.computer = None
+        self.search = None
+        self.infinite = False
+        # a bestmove found during "go infinite", only sent
+        # once the GUI says "stop"
+        self.pending_move = None
+        self.search_start = 0.0
+
+    def send(self, line:str):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line:str) -> bool:
+        # runs one command, returns False on "quit"
+        tokens = line.split()
+        if len(tokens) == 0:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {NAME}")
+            self.send(f"id author {AUTHOR}")
+            self.send(f"option name Hash type spin default {c.HASH_SIZE_MB} min {MIN_HASH_MB} max {MAX_HASH_MB}")
+            self.send("option name OwnBook type check default true")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.stop()
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            self.close_computer()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.close_computer()
+            return False
+        return True
+
+    def set_option(self, args:list):
+        # setoption name <name> value <value>
+        if "name" not in args:
+            return
+        value_at = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:value_at]).lower()
+        value = " ".join(args[value_at + 1:])
+        if name == "hash":
+            try:
+                size = int(value)
+            except ValueError:
+                self.send(f"info string invalid Hash value {value!r}")
+                return
+            self.hash_size_mb = min(max(size, MIN_HASH_MB), MAX_HASH_MB)
+        elif name == "ownbook":
+            self.own_book = value.lower() == "true"
+        else:
+            return
+        # the next search makes a Computer with the new settings
+        self.close_computer()
+
+    def set_position(self, args:list):
+        # position startpos [moves ...] or position fen <fen> [moves ...]
+        moves_at = args.index("moves") if "moves" in args else len(args)
+        if len(args) > 0 and args[0] == "fen":
+            try:
+                state = GameState.from_fen(" ".join(args[1:moves_at]))
+            except ValueError as error:
+                self.send(f"info string {error}")
+                return
+        else:
+            state = GameState()
+        for uci in args[moves_at + 1:]:
+            moves = {move.uci: move for move in state.all_legal_moves()}
+            if uci not in moves:
+                self.send(f"info string illegal move {uci}")
+                break
+            state.make_move(moves[uci])
+        self.state = state
+
+    def go(self, args:list):
+        # go [wtime x] [btime x] [winc x] [binc x] [movestogo x]
+        #    [movetime x] [depth x] [nodes x] [infinite]
+        options = {}
+        for i, token in enumerate(args[:-1]):
+            if args[i + 1].lstrip("-").isdigit():
+                options[token] = int(args[i + 1])
+        self.infinite = "infinite" in args
+        timed = self.infinite or any(option in options for option in ("wtime", "btime", "movetime", "nodes"))
+        if self.computer is None:
+            self.computer = c.Computer(self.state, hash_size_mb=self.hash_size_mb,
+                book_file=c.BOOK_FILE if self.own_book else None)
+            self.computer.on_depth = self.report
+        cpu = self.computer
+        cpu.depth = options.get("depth", MAX_DEPTH if timed else c.DEPTH)
+        # the depth the GUI asks for is searched exactly
+        cpu.fixed_depth = "depth" in options
+        cpu.node_limit = options.get("nodes", float("inf"))
+        cpu.time_limit = None
+        self.pending_move = None
+        self.search_start = time.perf_counter()
+        self.search = c.BackgroundSearch(cpu, self.state, self.move_time(options), self.finish)
+        self.search.start()
+
+    def move_time(self, options:dict) -> float:
+        # seconds to search for, or None for no limit
+        if self.infinite:
+            return None
+        if "movetime" in options:
+            return max(options["movetime"] - MOVE_OVERHEAD, 1) / 1000
+        side = "w" if self.state.white_to_move else "b"
+        if side + "time" not in options:
+            return None
+        left = options[side + "time"]
+        budget = left / options.get("movestogo", MOVES_TO_GO) + options.get(side + "inc", 0) * 3 / 4
+        # never more than half of what is left
+        budget = min(budget, left / 2) - MOVE_OVERHEAD
+        return max(budget, 10) / 1000
+
+    def report(self, depth:int, score:int, move):
+        # info line after each depth of the search
+        cpu = self.computer
+        elapsed = time.perf_counter() - self.search_start
+        nodes = cpu.nodes + cpu.qnodes
+        if abs(score) > c.MATE_BOUND:
+            # plies to mate to moves to mate
+            plies = c.CHECKMATE - abs(score)
+            score_text = f"mate {(plies + 1) // 2 if score > 0 else -(plies // 2)}"
+        else:
+            score_text = f"cp {score}"
+        self.send(f"info depth {depth} score {score_text} nodes {nodes} "
+            f"nps {int(nodes / elapsed) if elapsed > 0 else 0} time {int(elapsed * 1000)} pv {move.uci}")
+
+    def finish(self, move):
+        # called on the search thread when the search ends
+        error = self.search.error
+        if error is not None:
+            # the GUI still gets its bestmove, a null move
+            self.send(f"info string search failed: {type(error).__name__}: {error}")
+        best = "0000" if move is None else move.uci
+        if self.infinite and not self.search.cancelled:
+            # "go infinite" waits for "stop" before answering
+            self.pending_move = best
+            return
+        self.send(f"bestmove {best}")
+
+    def stop(self):
+        # stops the search (if there is one) and waits for
+        # it to send its bestmove
+        search = self.search
+        if search is None:
+            return
+        search.cancel()
+        search.thread.join()
+        self.search = None
+        if self.pending_move is not None:
+            self.send(f"bestmove {self.pending_move}")
+            self.pending_move = None
+
+    def close_computer(self):
+        if self.computer is not None:
+            self.computer.close()
+            self.computer = None
+
+def main():
+    uci = UCIEngine()
+    for line in sys.stdin:
+        if not uci.handle(line):
+            break
+    else:
+        uci.stop()
+        uci.close_computer()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import random
+from bitboard import DIM, PIECES
+
+# Zobrist keys for hashing positions.
+
+# Every (piece, square) pair, black to move, each castling
+# right and each en passant file gets a random 64-bit number.
+# The key of a position is all the numbers that apply to it
+# XOR-ed together. Since XOR-ing a number twice cancels out,
+# moving a piece only needs its old square's number XOR-ed
+# out and its new square's number XOR-ed in, so the key can
+# be updated move by move instead of being worked out again.
+# The seed is fixed so keys are the same every time the
+# program runs.
+
+SEED = 2022
+
+_random = random.Random(SEED)
+
+def _random_key() -> int:
+    return _random.getrandbits(64)
+
+# PIECE_KEYS[piece][square]
+PIECE_KEYS = {piece: [_random_key() for sq in range(DIM * DIM)] for piece in PIECES}
+SIDE_KEY = _random_key()
+# one key per castling right, CASTLING_KEYS has the combined
+# key for all 16 combinations of the 4 rights bits
+_CASTLING_RIGHT_KEYS = [_random_key() for i in range(4)]
+CASTLING_KEYS = []
+for rights in range(16):
+    combined = 0
+    for i in range(4):
+        if rights & (1 << i):
+            combined ^= _CASTLING_RIGHT_KEYS[i]
+    CASTLING_KEYS.append(combined)
+EP_KEYS = [_random_key() for col in range(DIM)]